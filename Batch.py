@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import glob
+import json
+import time
+import hashlib
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Parser import Parser
+from Tracer import Tracer
+from Symbols import Symbols
+
+# Runs the parse -> trace -> export pipeline for many session logs in a process pool.
+# - inputs are files, directories (searched for *.log) or glob patterns
+# - logs already processed are skipped by file identity (device, inode, size and mtime)
+#   kept in a ledger file in the output directory
+# - a failing log doesn't stop the others, its error is reported in the summary;
+#   a log without events fails too, and failed logs are retried on the next run
+# - progress messages of the workers are dropped, only the summary is printed
+class Batch:
+    LEDGER = '.tracer-batch.json'
+
+    def __init__(self, output_dir: str, jobs: int = 1, force: bool = False):
+        self.output_dir = output_dir
+        self.jobs = jobs
+        self.force = force
+        self.ledger_path = os.path.join(output_dir, Batch.LEDGER)
+        self.ledger = {}
+
+    @staticmethod
+    def expand(patterns: list[str]) -> list[str]:
+        res = {}
+        for pattern in patterns:
+            if os.path.isdir(pattern):
+                paths = glob.glob(os.path.join(pattern, '**', '*.log'), recursive=True)
+            else:
+                paths = glob.glob(pattern, recursive=True)
+            for path in paths:
+                if os.path.isfile(path):
+                    res[os.path.abspath(path)] = 1
+        return sorted(res)
+
+    @staticmethod
+    def identity(path: str) -> str:
+        st = os.stat(path)
+        return f'{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}'
+
+    @staticmethod
+    def names(paths: list[str]) -> dict:
+        stems = {}
+        for path in paths:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            stems.setdefault(stem, []).append(path)
+        res = {}
+        for stem, same in stems.items():
+            for path in same:
+                if len(same) == 1:
+                    res[path] = stem
+                else:
+                    res[path] = f'{stem}-{hashlib.sha1(path.encode()).hexdigest()[:8]}'
+        return res
+
+    def load_ledger(self) -> None:
+        try:
+            with open(self.ledger_path, 'r', encoding='utf-8') as f:
+                self.ledger = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.ledger = {}
+
+    def save_ledger(self) -> None:
+        with open(self.ledger_path, 'w', encoding='utf-8') as f:
+            json.dump(self.ledger, f, indent=2)
+
+    def run(self, patterns: list[str]) -> list[dict]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.load_ledger()
+        paths = Batch.expand(patterns)
+        names = Batch.names(paths)
+        results = []
+        todo = {}
+        for path in paths:
+            ident = Batch.identity(path)
+            if not self.force and self.ledger.get(path) == ident:
+                results.append({'log': path, 'status': 'skipped'})
+                continue
+            todo[path] = (ident, os.path.join(self.output_dir, names[path]))
+
+        if self.jobs > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                futures = {pool.submit(Batch.process, path, output): path for path, (_, output) in todo.items()}
+                for future in as_completed(futures):
+                    results.append(self.collect(futures[future], future))
+        else:
+            for path, (_, output) in todo.items():
+                results.append(Batch.process(path, output))
+
+        for result in results:
+            if result['status'] == 'ok':
+                self.ledger[result['log']] = todo[result['log']][0]
+        self.save_ledger()
+        return sorted(results, key=lambda r: r['log'])
+
+    def collect(self, path: str, future) -> dict:
+        try:
+            return future.result()
+        except Exception as e:
+            return {'log': path, 'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+
+    @staticmethod
+    def process(path: str, output: str) -> dict:
+        res = {'log': path, 'output': output}
+        started = time.perf_counter()
+        # workers run many sessions, symbols of the previous one are not needed
+        Symbols.clear()
+        messages = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(messages):
+                parser = Parser(path, selector=Tracer.selector)
+                res['parse'] = time.perf_counter() - started
+                if not parser.events:
+                    # Parser reports unreadable logs with a message, not an exception
+                    reason = messages.getvalue().strip().splitlines()
+                    raise ValueError(f'No events found in {path}' + (f' ({reason[0][:200]})' if reason else ''))
+                tracer = Tracer(parser.events)
+                res['prepare'] = time.perf_counter() - started - res['parse']
+                tracer.export(output)
+            res['export'] = time.perf_counter() - started - res['parse'] - res['prepare']
+            res['events'] = len(parser.events)
+            res['traces'] = len(tracer.traces)
+            res['status'] = 'ok'
+        except Exception as e:
+            res['status'] = 'failed'
+            res['error'] = f'{type(e).__name__}: {e}'
+        res['time'] = time.perf_counter() - started
+        return res
+
+    @staticmethod
+    def render(results: list[dict]) -> str:
+        res = f"{'log':<40} {'status':>8} {'events':>9} {'traces':>9} {'parse':>8} {'prepare':>8} {'export':>8} {'total':>8}\n"
+        for r in results:
+            name = os.path.basename(r['log'])
+            res += f"{name:<40} {r['status']:>8}"
+            if r['status'] == 'ok':
+                res += f" {r['events']:>9} {r['traces']:>9} {r['parse']:>8.2f} {r['prepare']:>8.2f} {r['export']:>8.2f} {r['time']:>8.2f}"
+            elif r['status'] == 'failed':
+                res += f" {r['error']}"
+            res += '\n'
+        counts = {}
+        for r in results:
+            counts[r['status']] = counts.get(r['status'], 0) + 1
+        res += ', '.join(f'{n} {status}' for status, n in sorted(counts.items())) + '\n'
+        return res
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+
+from CT import CT
+from Parser import Parser
+from Tracer import Tracer
+from Filter import FindChildren
+
+# Times every stage of the log -> JSON pipeline separately:
+# read, JSON decode, parse dispatch, Tracer.prepare, CT.build_file, JSON write, FindChildren.
+# Results are plain dicts that can be saved as JSON and compared between runs.
+class Bench:
+    STAGES = ['read', 'decode', 'dispatch', 'prepare', 'build', 'write', 'children']
+
+    def __init__(self, path: str, repeat: int = 1):
+        self.path = path
+        self.repeat = repeat
+        self.lines = 0
+
+    def run(self) -> dict:
+        stages = {}
+        for _ in range(self.repeat):
+            for name, spent in self.run_once().items():
+                if name not in stages or spent < stages[name]:
+                    stages[name] = spent
+        res = {}
+        for name in self.STAGES:
+            spent = stages[name]
+            res[name] = {
+                'time': spent,
+                'lines_per_sec': int(self.lines / spent) if spent else 0,
+            }
+        return {
+            'log': self.path,
+            'size': os.path.getsize(self.path),
+            'lines': self.lines,
+            'repeat': self.repeat,
+            'python': sys.version.split()[0],
+            'time': sum(stages.values()),
+            'peak_rss': Bench.peak_rss(),
+            'stages': res,
+        }
+
+    def run_once(self) -> dict:
+        res = {}
+        started = time.perf_counter()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+        res['read'] = Bench.lap(started)
+        self.lines = len(lines)
+
+        started = time.perf_counter()
+        datas = []
+        for line in lines:
+            try:
+                datas.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        res['decode'] = Bench.lap(started)
+
+        started = time.perf_counter()
+        parser = Parser('')
+        for data in datas:
+            parser.add_data(data)
+        res['dispatch'] = Bench.lap(started)
+
+        started = time.perf_counter()
+        tracer = Tracer(parser.events)
+        res['prepare'] = Bench.lap(started)
+
+        started = time.perf_counter()
+        file = CT.build_file(tracer.selected())
+        res['build'] = Bench.lap(started)
+
+        started = time.perf_counter()
+        with tempfile.TemporaryFile('w', encoding='utf-8') as f:
+            json.dump(file, f, indent=2)
+        res['write'] = Bench.lap(started)
+
+        started = time.perf_counter()
+        root = Bench.find_root(tracer)
+        if root:
+            FindChildren(tracer).start(root)
+        res['children'] = Bench.lap(started)
+        return res
+
+    @staticmethod
+    def find_root(tracer: Tracer) -> str:
+        for trace in tracer.traces:
+            if trace.task.startswith('DISP_MSG.'):
+                return trace.task
+        return ''
+
+    @staticmethod
+    def lap(started: float) -> float:
+        return round(time.perf_counter() - started, 6)
+
+    @staticmethod
+    def peak_rss() -> int:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+    @staticmethod
+    def render(result: dict) -> str:
+        res = f"{result['log']}: {result['lines']} lines, {result['time']:.3f}s, peak RSS {result['peak_rss'] >> 20} MB\n"
+        for name, stage in result['stages'].items():
+            res += f"{name:>10}: {stage['time']:9.3f}s {stage['lines_per_sec']:>12} lines/s\n"
+        return res
+
+    @staticmethod
+    def compare(old: dict, new: dict, threshold: float = 0.1) -> tuple[str, int]:
+        res = f"{'stage':>10} {'old':>9} {'new':>9} {'change':>8}\n"
+        regressions = 0
+        rows = [(name, old['stages'][name]['time'], new['stages'][name]['time'])
+                for name in Bench.STAGES if name in old['stages'] and name in new['stages']]
+        rows.append(('total', old['time'], new['time']))
+        rows.append(('rss_mb', old['peak_rss'] / (1 << 20), new['peak_rss'] / (1 << 20)))
+        for name, was, now in rows:
+            change = (now - was) / was if was else 0
+            mark = ''
+            if change > threshold:
+                mark = ' REGRESSION'
+                regressions += 1
+            res += f'{name:>10} {was:>9.3f} {now:>9.3f} {change:>+8.1%}{mark}\n'
+        return res, regressions
+
+    @staticmethod
+    def save(result: dict, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Benchmark results saved to {path}")
+
+    @staticmethod
+    def load(path: str) -> dict:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
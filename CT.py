@@ -1,18 +1,18 @@
 #!/usr/bin/env python3
 
-import re
-
 from Trace import Trace
+from Symbols import Symbols
 
 # Chrome Trace
 class CT:
     short_names = False
 
     @staticmethod
-    def build_file(traces: list[Trace]) -> dict:
-        cts = []
-        for trace in traces:
-            cts.append(CT.X(trace))
+    def build_file(traces: list[Trace], counters: list[dict] = None, events: list[dict] = None) -> dict:
+        # `events` are the traces already converted
+        cts = list(events) if events is not None else [CT.X(trace) for trace in traces]
+        if counters:
+            cts.extend(counters)
         return {
             'traceEvents': cts,
             'displayTimeUnit': 'ms',
@@ -28,6 +28,15 @@ class CT:
         data = CT.build('X', trace)
         data['dur'] = trace.get_ms('finish') - data['ts']
         return data
+    @staticmethod
+    def C(name: str, ts: int, values: dict, pid: int = 0) -> dict:
+        return {
+            'name': name,
+            'ph':   'C',
+            'ts':   ts,
+            'pid':  pid,
+            'args': values,
+        }
 
     @staticmethod
     def build(ph: str, trace: Trace) -> dict:
@@ -53,19 +62,16 @@ class CT:
     def trace2pid(trace: Trace) -> int:
         if not trace.has('agent'):
             return 0
-        ms = re.search(r'(\d+)$', trace.get('agent'))
-        if ms:
-            return int(ms.group(1))
-        return 0
+        return Symbols.agent2pid(trace.get('agent'))
     @staticmethod
     def trace2tid(trace: Trace) -> int:
-        return 0
+        return trace.data.get('lane', 0)
 
     @staticmethod
     def trace2args(trace: Trace) -> dict:
         args = trace.get_dict('args').copy()
         args.update(trace.data)
-        for key in ['agentID', 'args', 'cat', 'ltip', 'time', 'reset_time', 'message']:
+        for key in ['agentID', 'args', 'cat', 'ltip', 'time', 'reset_time', 'message', 'plan_parent', 'lane']:
             if key in args:
                 del args[key]
         res = {}
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+import json
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from Trace import Trace
+from Parser import Parser
+from Tracer import Tracer
+from Symbols import Symbols
+from Selector import Selector
+
+# Streaming duration statistics of one group of traces.
+# Memory is bounded: quantiles come from a log-scale histogram (about 1% relative error)
+# and the significance test uses a fixed-size uniform reservoir sample.
+class Summary:
+    BASE = 1.02
+    RESERVOIR = 1000
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.longest = 0
+        self.hist = {}
+        self.sample = []
+
+    def add(self, dur: int, rnd: random.Random) -> None:
+        self.count += 1
+        self.total += dur
+        self.longest = max(self.longest, dur)
+        bucket = int(math.log(dur, Summary.BASE)) if dur > 0 else -1
+        self.hist[bucket] = self.hist.get(bucket, 0) + 1
+        if len(self.sample) < Summary.RESERVOIR:
+            self.sample.append(dur)
+        else:
+            no = rnd.randrange(self.count)
+            if no < Summary.RESERVOIR:
+                self.sample[no] = dur
+
+    def quantile(self, q: float) -> float:
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.hist):
+            seen += self.hist[bucket]
+            if seen > rank:
+                return 0 if bucket < 0 else min(Summary.BASE ** (bucket + 0.5), self.longest)
+        return self.longest
+
+# Compares two sessions by trace durations per group:
+# (optype, type, status), type of DISP_MSG being its message kind and status set for actions only.
+# Both logs are streamed through Parser and Tracer in parallel processes, traces are not kept.
+# A shift is reported when the Mann-Whitney U test says the samples differ (p < alpha)
+# and p50 or p99 moves by more than the threshold; throughput is compared as the
+# rate of traces per second of session time. The U test needs min_count traces on both sides,
+# the rate test min_count traces in total. Groups seen in one session only are marked new or gone.
+class Compare:
+    def __init__(self, selector: Selector = None, threshold: float = 0.1, alpha: float = 0.01, min_count: int = 20):
+        self.selector = selector or Selector()
+        self.threshold = threshold
+        self.alpha = alpha
+        self.min_count = min_count
+
+    @staticmethod
+    def group(trace: Trace) -> tuple:
+        optype = trace.get('optype')
+        status = trace.data.get('status', '') if optype == Trace.ACTION else ''
+        return optype, trace.get('type'), status
+
+    @staticmethod
+    def summarize(path: str, selector: Selector) -> dict:
+        Symbols.clear()
+        rnd = random.Random(0)
+        tracer = Tracer([])
+        parser = Parser('', selector=selector)
+        groups = {}
+        first = last = None
+        for trace in tracer.iterate(parser.iter_events(path)):
+            if not selector.accepts(trace):
+                continue
+            start = trace.get_ms('start')
+            finish = trace.get_ms('finish')
+            first = start if first is None else min(first, start)
+            last = finish if last is None else max(last, finish)
+            key = Compare.group(trace)
+            summary = groups.get(key)
+            if summary is None:
+                summary = groups[key] = Summary()
+            summary.add(finish - start, rnd)
+        return {'log': path, 'duration': (last - first) / 1000000 if first is not None else 0, 'groups': groups}
+
+    def run(self, old_path: str, new_path: str, jobs: int = 2) -> dict:
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                old, new = pool.map(Compare.summarize, [old_path, new_path], [self.selector] * 2)
+        else:
+            old, new = Compare.summarize(old_path, self.selector), Compare.summarize(new_path, self.selector)
+        return self.compare(old, new)
+
+    def compare(self, old: dict, new: dict) -> dict:
+        rows = []
+        for key in sorted(set(old['groups']) | set(new['groups'])):
+            was = old['groups'].get(key, Summary())
+            now = new['groups'].get(key, Summary())
+            row = {
+                'optype': key[0], 'type': key[1], 'status': key[2],
+                'old_count': was.count, 'new_count': now.count,
+                'old_rate': Compare.rate(was.count, old['duration']),
+                'new_rate': Compare.rate(now.count, new['duration']),
+                'old_p50': Compare.ms(was.quantile(0.5)) if was.count else None,
+                'new_p50': Compare.ms(now.quantile(0.5)) if now.count else None,
+                'old_p99': Compare.ms(was.quantile(0.99)) if was.count else None,
+                'new_p99': Compare.ms(now.quantile(0.99)) if now.count else None,
+                'p': None,
+                'shift': '',
+            }
+            if was.count >= self.min_count and now.count >= self.min_count:
+                row['p'] = Compare.mann_whitney(was.sample, now.sample)
+            row['shift'] = self.shift(row, old['duration'], new['duration'])
+            rows.append(row)
+        return {
+            'old': {'log': old['log'], 'duration': old['duration']},
+            'new': {'log': new['log'], 'duration': new['duration']},
+            'rows': rows,
+        }
+
+    def shift(self, row: dict, old_duration: float, new_duration: float) -> str:
+        if not row['old_count']:
+            return 'new'
+        if not row['new_count']:
+            return 'gone'
+        marks = []
+        if row['p'] is not None and row['p'] < self.alpha:
+            for q in ['p50', 'p99']:
+                change = Compare.change(row[f'old_{q}'], row[f'new_{q}'])
+                if abs(change) > self.threshold:
+                    marks.append(f'{q}{"+" if change > 0 else "-"}')
+        if row['old_count'] + row['new_count'] >= self.min_count and old_duration and new_duration:
+            # exact rates, a rounded one may be 0
+            change = Compare.change(row['old_count'] / old_duration, row['new_count'] / new_duration)
+            if abs(change) > self.threshold and \
+                    Compare.rates_differ(row['old_count'], row['new_count'], old_duration, new_duration, self.alpha):
+                marks.append(f'rate{"+" if change > 0 else "-"}')
+        return ' '.join(marks)
+
+    @staticmethod
+    def ms(us: float) -> float:
+        return round(us / 1000, 3)
+
+    @staticmethod
+    def rate(count: int, duration: float) -> float:
+        return round(count / duration, 3) if duration else 0
+
+    @staticmethod
+    def change(was: float, now: float) -> float:
+        return (now - was) / was if was else 0
+
+    @staticmethod
+    def rates_differ(old_count: int, new_count: int, old_duration: float, new_duration: float, alpha: float) -> bool:
+        # conditional test of two Poisson rates: how the total count splits between the sessions
+        n = old_count + new_count
+        if not n or not old_duration or not new_duration:
+            return False
+        share = new_duration / (old_duration + new_duration)
+        z = (new_count - n * share) / math.sqrt(n * share * (1 - share))
+        return math.erfc(abs(z) / math.sqrt(2)) < alpha
+
+    @staticmethod
+    def mann_whitney(xs: list, ys: list) -> float:
+        # two-sided p-value of the U test, normal approximation with tie correction
+        n1, n2 = len(xs), len(ys)
+        values = sorted([(v, 0) for v in xs] + [(v, 1) for v in ys])
+        rank_sum = 0.0
+        ties = 0.0
+        i = 0
+        while i < len(values):
+            j = i
+            while j < len(values) and values[j][0] == values[i][0]:
+                j += 1
+            rank = (i + j + 1) / 2
+            rank_sum += rank * sum(1 for _, side in values[i:j] if side == 0)
+            ties += (j - i) ** 3 - (j - i)
+            i = j
+        u = rank_sum - n1 * (n1 + 1) / 2
+        n = n1 + n2
+        sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+        if not sigma:
+            return 1.0
+        z = (u - n1 * n2 / 2) / sigma
+        return math.erfc(abs(z) / math.sqrt(2))
+
+    @staticmethod
+    def render(result: dict, all_rows: bool = False) -> str:
+        res = f"old: {result['old']['log']} ({result['old']['duration']:.0f} s)\n"
+        res += f"new: {result['new']['log']} ({result['new']['duration']:.0f} s)\n"
+        res += (f"{'':2} {'type':<40} {'status':<20} {'count':>13} {'rate/s':>15} "
+                f"{'p50 ms':>19} {'p99 ms':>19} {'p':>8}  shift\n")
+        def num(value):
+            return '-' if value is None else f'{value:g}'
+        for row in result['rows']:
+            if not all_rows and not row['shift']:
+                continue
+            p = '-' if row['p'] is None else f"{row['p']:.1e}"
+            res += (f"{row['optype']:2} {row['type']:<40.40} {row['status']:<20.20} "
+                    f"{row['old_count']:>6}/{row['new_count']:<6} "
+                    f"{num(row['old_rate']):>7}/{num(row['new_rate']):<7} "
+                    f"{num(row['old_p50']):>9}/{num(row['new_p50']):<9} "
+                    f"{num(row['old_p99']):>9}/{num(row['new_p99']):<9} {p:>8}  {row['shift']}\n")
+        shifts = sum(1 for row in result['rows'] if row['shift'])
+        res += f"{shifts} of {len(result['rows'])} groups shifted\n"
+        return res
+
+    @staticmethod
+    def save(result: dict, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Comparison saved to {path}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+from Trace import Trace
+from Selector import Selector
+
+# Merges traces of periodic types into one aggregated slice per type, optype, agent and time bucket,
+# named TYPE.agg.BUCKET.OPTYPE[.AGENT].
+# The slice spans its traces clipped to the bucket and has args:
+# count, total_ms and max_ms of the merged traces, bucket_ms.
+# Without a bucket size the smallest one from BUCKETS is chosen that keeps
+# the number of aggregated slices within the budget.
+class Downsampler:
+    BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000, 300000, 600000, 3600000]
+
+    def __init__(self, bucket_ms: int = 0, budget: int = 10000, types: list[str] = None):
+        if not bucket_ms and budget <= 0:
+            raise ValueError('Either bucket_ms or a positive budget must be given')
+        self.bucket_ms = bucket_ms
+        self.budget = budget
+        self.types = set(types or Selector.PERIODIC)
+
+    def downsample(self, traces: list[Trace]) -> list[Trace]:
+        res = []
+        periodic = []
+        for trace in traces:
+            if trace.get('type') in self.types:
+                key = (trace.get('type'), trace.get('optype'), trace.get('agent'))
+                periodic.append((key, trace.get_ms('start'), trace.get_ms('finish'), trace))
+            else:
+                res.append(trace)
+        if not periodic:
+            return res
+        bucket = (self.bucket_ms or self.choose_bucket(periodic)) * 1000
+        buckets = {}
+        for key, start, finish, trace in periodic:
+            bucket_key = (key, start // bucket)
+            agg = buckets.get(bucket_key)
+            if agg is None:
+                buckets[bucket_key] = [start, finish, 1, finish - start, finish - start, trace]
+                continue
+            agg[0] = min(agg[0], start)
+            agg[1] = max(agg[1], finish)
+            agg[2] += 1
+            agg[3] += finish - start
+            agg[4] = max(agg[4], finish - start)
+        aggregated = []
+        for ((type, optype, agent), no), (start, finish, count, total, longest, first) in buckets.items():
+            finish = min(finish, (no + 1) * bucket)
+            aggregated.append(Trace({
+                'task': f'{type}.agg.{no}.{optype}' + (f'.{agent}' if agent else ''),
+                'optype': optype,
+                'agent': agent,
+                'scope': first.data.get('scope', ''),
+                'start': Trace.ms2time(start),
+                'finish': Trace.ms2time(max(finish, start)),
+                'args': {
+                    'count': count,
+                    'total_ms': round(total / 1000, 3),
+                    'max_ms': round(longest / 1000, 3),
+                    'bucket_ms': bucket // 1000,
+                },
+            }))
+        aggregated.sort(key=lambda t: t.get_ms('start'))
+        print(f"Downsampled {len(periodic)} periodic traces to {len(aggregated)} with {bucket // 1000} ms buckets")
+        return res + aggregated
+
+    def choose_bucket(self, periodic: list[tuple]) -> int:
+        # A bigger bucket doesn't always occupy fewer buckets: 2 -> 5 ms buckets don't nest,
+        # so traces at 4 and 5.9 ms share a 2 ms bucket and split over two 5 ms ones.
+        # The ladder is short, so it is scanned from the smallest bucket.
+        for bucket_ms in Downsampler.BUCKETS:
+            bucket = bucket_ms * 1000
+            if len(set((key, start // bucket) for key, start, _, _ in periodic)) <= self.budget:
+                return bucket_ms
+        return Downsampler.BUCKETS[-1]
@@ -33,10 +33,10 @@ class FindChildren:
 
     def export(self, filename: str):
         traces = []
-        for trace in self.tracer.traces:
+        for trace in self.tracer.selected():
             if trace.task in self.tasks:
                 traces.append(trace)
-        Tracer.export_traces(traces, f'{filename}.json')
+        Tracer.write_traces(traces, f'{filename}.json')
 
 class FindRelated(FindChildren):
     def __init__(self, tracer):
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import random
+import datetime
+import tempfile
+
+from Trace import Trace
+
+# Generates synthetic planner logs for benchmarks and tests.
+# The log mimics a real simulation session and contains every line format Parser understands:
+# - `CLI Args` session start
+# - APPEND PLAN / REPLACE PLAN blocks with numbered task lines (including `orgn=` wrapped tasks)
+# - DECOMPOSED lines followed by subtasks
+# - Order agent / New task received / status changed lines for operators
+# - Task completed and Task is marked as completed lines
+# Plus noise lines that no parser matches or that fail validation.
+class Generator:
+    KINDS = ['AOApplicationSummary', 'BinFromWSChannelToBinStorageMove', 'ProductFromBinToWSTableMove']
+    PERIODIC = ['SOLVE_MAPF', 'CHECK_SELF_CONTROL_REQS', 'CHECK_ROBOT_BATTERIES', 'INCREMENT_THROUGHPUT']
+    DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+    TICK_MS = 500
+    START = datetime.datetime(2025, 4, 22, 15, 52, 44, tzinfo=datetime.timezone.utc)
+
+    def __init__(self, agents: int = 12, messages: int = 100, tasks_per_plan: int = 4,
+                 replan_every: int = 10, noise: float = 0.05, seed: int = 0):
+        self.agents = [f'RS{i + 1}' for i in range(agents)]
+        self.messages = messages
+        self.tasks_per_plan = tasks_per_plan
+        self.replan_every = replan_every
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.start = Generator.START
+        self._ids = 0
+        self._msg_id = 870000000082800
+        self._plan = {}
+        self._queue = {}
+        self._active = 0
+        self._lines = []
+        self._tick = 0
+        self._offset = 0
+
+    def write(self, path: str) -> int:
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.lines():
+                f.write(line + '\n')
+                count += 1
+        print(f"Generated {count} lines to {path}")
+        return count
+
+    # Writes a generated log to a new temporary file and returns its path, the caller removes it.
+    @staticmethod
+    def temp_log(**kwargs) -> str:
+        fd, path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        Generator(**kwargs).write(path)
+        return path
+
+    # A finished operator of task `no`, from `start` to `finish` ms after the session start.
+    @staticmethod
+    def trace(no: int, start: int, finish: int, agent: str = 'RS1') -> Trace:
+        base = int(Generator.START.timestamp() * 1000000)
+        return Trace({
+            'task': f'CARRY_BIN.3p.{no}',
+            'optype': Trace.OPERATOR,
+            'agent': agent,
+            'args': {'msgID': str(no)},
+            'start': Trace.ms2time(base + start * 1000),
+            'finish': Trace.ms2time(base + finish * 1000),
+        })
+
+    def lines(self):
+        self._cli_args()
+        left = self.messages
+        while left > 0 or self._active:
+            self._begin_tick()
+            if left > 0 and self._tick % 2 == 0:
+                self._new_message()
+                left -= 1
+            self._periodic()
+            if self._tick % self.replan_every == 0:
+                self._replace_plan()
+            for action in self._queue.pop(self._tick, []):
+                action()
+            if self.random.random() < self.noise:
+                self._noise()
+            self._tick += 1
+            yield from self._lines
+            self._lines = []
+
+    def _begin_tick(self) -> None:
+        self._offset = 0
+
+    def _time(self) -> str:
+        ms = self._tick * self.TICK_MS + self._offset
+        self._offset += self.random.randint(0, 3)
+        time = self.start + datetime.timedelta(milliseconds=ms)
+        return time.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    def _emit(self, scope: str, message: str, **extra) -> None:
+        data = {'level': 'info'}
+        data.update(extra)
+        data['time'] = self._time()
+        data['scope'] = scope
+        data['tick'] = self._tick
+        data['message'] = message
+        self._lines.append(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+    def _later(self, ticks: int, action) -> None:
+        self._queue.setdefault(self._tick + ticks, []).append(action)
+
+    def _new_id(self, prefix: str) -> str:
+        self._ids += 1
+        no, res = self._ids, ''
+        while no:
+            no, rem = divmod(no, len(self.DIGITS))
+            res = self.DIGITS[rem] + res
+        return f'{prefix}.{res}'
+
+    def _agent(self) -> str:
+        return self.random.choice(self.agents)
+
+    def _node(self) -> str:
+        return f'51.24.4-WS-{self.random.randint(1, 9)}-N-{self.random.randint(10000000000, 99999999999)}-1f0'
+
+    def _cli_args(self) -> None:
+        args = ['/tmp/go-build/exe/ferroagent', 'simulate', '--log-separate', '-a', str(len(self.agents)),
+                '-m', str(self.messages), '-S', '51.24.4-N', '-t', '100000']
+        self._emit('/', 'CLI Args', args=args)
+
+    def _list_tasks(self, scope: str, tasks: list[str]) -> None:
+        for no, task in enumerate(tasks):
+            self._emit(scope, f'{no}. {self._plan[task]}')
+
+    def _add_task(self, task: str, line: str) -> str:
+        self._plan[task] = line
+        return task
+
+    def _new_message(self) -> None:
+        msg = self._new_id('DISP_MSG.3p')
+        self._msg_id += 1
+        self._active += 1
+        kind = self.random.choice(self.KINDS)
+        args = f'msgID={self._msg_id}, kind={kind}, status=Created'
+        self._add_task(msg, f'[T] {msg}({args}) Pre: `STATE_READY()`')
+        self._emit('/leader/squad', 'APPEND PLAN')
+        self._list_tasks('/leader/squad', [msg])
+        self._later(1, lambda: self._decompose_message(msg, args))
+
+    def _decompose_message(self, msg: str, msg_args: str) -> None:
+        self._emit('/planner', f'DECOMPOSED {msg}')
+        group = f'{self.random.getrandbits(32):08x}-b121-49cb-9a23-e88deddcfc63'
+        mark = self._add_task(self._new_id('MARK_GROUP_ACTIVE.3p'),
+            f'[O] {{}}({group} true) Pre: `IF_VALID(task={msg})`, `CAN_PERFORM_DM()`')
+        tasks = [mark]
+        prev = mark
+        for _ in range(max(self.tasks_per_plan - 2, 1)):
+            agent = self._agent()
+            task = self._add_task(self._new_id('CARRY_BIN.3p'),
+                f'[O] {{}}(agent={agent}, node={self._node()}, e=[0.01500, 0.02500]) '
+                f'Pre: `RUN_AFTER(task={prev})`, `CAN_LEASE_NODE(tenant={agent}, node={self._node()})`, `NO_BIN`')
+            tasks.append(task)
+            prev = task
+        wrap = self._add_task(self._new_id('WRAP.3p'),
+            f'[T] {{}}(orgn={msg}({msg_args})) Pre: `PLAN_AFTER(task={prev})`')
+        tasks.append(wrap)
+        for task in tasks:
+            self._plan[task] = self._plan[task].replace('{}', task, 1)
+        self._list_tasks('/planner', tasks + [msg])
+        self._later(1, lambda: self._perform(tasks[0], '', lambda: self._run_chain(tasks[1:-1], wrap, msg)))
+
+    def _run_chain(self, tasks: list[str], wrap: str, msg: str) -> None:
+        if not tasks:
+            self._finish_message(wrap, msg)
+            return
+        self._perform(tasks[0], self._agent(), lambda: self._run_chain(tasks[1:], wrap, msg))
+
+    def _perform(self, task: str, agent: str, then) -> None:
+        agent = agent or self._agent()
+        self._emit('/leader/executor', f'Order agent {agent} to perform task {task}')
+        self._emit('/agent', f'New task {task} received by agent', agentId=agent)
+        def done():
+            status = 'Completed: done' if self.random.random() > 0.02 else 'Failed: path blocked'
+            self._emit('/agent/action', f'Task {task} status changed to {status}', agentId=agent)
+            self._later(1, lambda: self._complete(task, then))
+        self._later(self.random.randint(1, 6), done)
+
+    def _complete(self, task: str, then) -> None:
+        rest = self._plan.pop(task, '')[4 + len(task):]
+        args = rest[:rest.index(') Pre:') + 1] if rest.startswith('(') else ''
+        self._emit('/leader/squad', f'Task {task}{args} completed. There are {len(self._plan)} task(s) left in the plan')
+        if then:
+            then()
+
+    def _finish_message(self, wrap: str, msg: str) -> None:
+        self._plan.pop(wrap, None)
+        self._emit('/leader/squad', f'Task {wrap} is marked as completed because {msg} is already completed')
+        self._complete(msg, None)
+        self._active -= 1
+
+    def _periodic(self) -> None:
+        tasks = []
+        for type in self.PERIODIC:
+            task = self._new_id(f'{type}.R')
+            tasks.append(self._add_task(task, f'[T] {task} Pre: `AFTER_TASK_TICK()`'))
+        self._emit('/leader/squad', 'APPEND PLAN')
+        self._list_tasks('/leader/squad', tasks)
+        self._later(1, lambda: self._decompose_periodic(tasks))
+
+    def _decompose_periodic(self, tasks: list[str]) -> None:
+        for task in tasks:
+            type = task.split('.')[0]
+            if type in ['SOLVE_MAPF', 'CHECK_SELF_CONTROL_REQS'] and self.random.random() < 0.3:
+                self._decompose_into_action(task, self._agent())
+            else:
+                self._complete(task, None)
+
+    def _decompose_into_action(self, parent: str, agent: str) -> None:
+        if parent.startswith('SOLVE_MAPF'):
+            task = self._add_task(self._new_id('DRE.R'), '')
+            self._plan[task] = f'[O] {task}(agent={agent}, from={self._node()}, to={self._node()}, len=1) ' \
+                f'Pre: `NO_BIN`, `CAN_RESERVE_PATH(agent={agent})`'
+        else:
+            task = self._add_task(self._new_id('SELF.R'), '')
+            self._plan[task] = f'[O] {task}({agent}) Pre: '
+        self._emit('/planner', f'DECOMPOSED {parent}')
+        self._list_tasks('/planner', [task, parent])
+        self._later(1, lambda: self._perform(task, agent, lambda: self._complete(parent, None)))
+
+    def _replace_plan(self) -> None:
+        self._emit('/leader/squad', 'REPLACE PLAN')
+        self._list_tasks('/leader/squad', list(self._plan))
+
+    def _noise(self) -> None:
+        choice = self.random.randint(0, 2)
+        if choice == 0:
+            self._emit('/leader/squad', f'Tick {self._tick} took {self.random.randint(1, 90)}ms')
+        elif choice == 1:
+            self._emit('/agent/position', 'Position updated', agentId=self._agent())
+        else:
+            self._lines.append(json.dumps({'level': 'warn', 'message': 'heartbeat'}))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import heapq
+
+from CT import CT
+from Trace import Trace
+
+# Places overlapping traces of a pid on separate thread tracks (lanes).
+# A sweep over start times keeps a min-heap of busy lanes by finish time and a min-heap
+# of free lane numbers, so every pid gets the smallest number of lanes and a trace
+# always takes the lowest free lane. Traces are ordered by (start, longest first, task),
+# so the same traces always get the same lanes.
+# The lane is kept in trace data and exported as tid by CT.
+class Lanes:
+    @staticmethod
+    def assign(traces: list[Trace]) -> int:
+        keyed = sorted((CT.trace2pid(t), t.get_ms('start'), -t.get_ms('finish'), t.task, no)
+                       for no, t in enumerate(traces))
+        lanes = 0
+        pid = None
+        for key_pid, start, neg_finish, _, no in keyed:
+            if key_pid != pid:
+                pid = key_pid
+                busy = []
+                free = []
+                count = 0
+            while busy and busy[0][0] <= start:
+                heapq.heappush(free, heapq.heappop(busy)[1])
+            if free:
+                lane = heapq.heappop(free)
+            else:
+                lane = count
+                count += 1
+                lanes = max(lanes, count)
+            heapq.heappush(busy, (-neg_finish, lane))
+            traces[no].data['lane'] = lane
+        return lanes
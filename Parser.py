@@ -2,8 +2,15 @@
 
 import re
 import json
+import heapq
+
+from Symbols import Symbols
 
 class Parser:
+    CACHE_SIZE = 100000
+    _args_cache = {}
+    _pres_cache = {}
+
     APPEND_PLAN = 'AppendPlan'
     REPLACE_PLAN = 'ReplacePlan'
     DECOMPOSED = 'Decomposed'
@@ -15,18 +22,36 @@ class Parser:
     TASK_COMPLETED = 'TaskCompleted'
     START_SESSION = 'StartSession'
 
+    SYMBOL_KEYS = ('scope', 'agent', 'status')
+    HEAD_KEYS = ('time', 'scope', 'tick')
+    _matcher = None
+
     @property
     def events(self) -> list[dict]: return self._events
     @property
     def unparsed(self) -> int: return self._unparsed
+    @property
+    def rejected(self) -> int: return self._rejected
+    @property
+    def invalid(self) -> int: return self._invalid
+    @property
+    def skipped(self) -> int: return self._skipped
 
-    def __init__(self, path: str):
+    def __init__(self, path: str | list[str], stats=None, selector=None, ticks=None):
         self._path = path
         self._events = []
         self._state = ''
         self._parent_task = ''
+        self._prev = {}
         self._count = 0
         self._unparsed = 0
+        self._rejected = 0
+        self._invalid = 0
+        self._skipped = 0
+        self._dropped = {}
+        self._contexts = []
+        self._current = 0
+        self._pending = set()
         self._task_exp = r'(?P<task>\w+\.\w+\.[\w\+]+)'
         self._orgn_exp = r'(?P<orgn>\w+\.\w+\.[\w\+]+)'
         self._args_exp = r'(\((?P<args>[^\)]+)\))?'
@@ -45,38 +70,198 @@ class Parser:
             ],
             self.START_SESSION:      [self._parse_StartSession],
         }
-        if path:
+        self.selector = selector
+        self.ticks = ticks
+        self.stats = stats
+        if stats and stats.enabled:
+            self._instrument(stats)
+        if isinstance(path, list):
+            self.read_files(path)
+        elif path:
             self.read_file(path)
 
+    def _instrument(self, stats) -> None:
+        self.decode = stats.wrap('parser.decode', self.decode)
+        self.add_data = stats.wrap('parser.dispatch', self.add_data)
+        for ltip, parsers in self._parsers.items():
+            self._parsers[ltip] = [stats.wrap(f'parser.{ltip}.{p.__name__}', p) for p in parsers]
+
     def read_file(self, path: str) -> None:
+        for data in self.iter_file(path):
+            self.add_data(data)
+
+    def iter_file(self, path: str):
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                prev = {}
                 for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        data = json.loads(line)
-                        res = self.parse_data(data)
-                        if res:
-                            self._events.append(res)
-                        ltip = res.get('ltip', '')
-                        if prev and prev['ltip'] == self.NEW_TASK and ltip != self.NEW_TASK:
-                            self._events.append({
-                                'ltip': self.PLAN_CHANGED,
-                                'time': prev['time'],
-                            })
-                        prev = res
-
-                    except json.JSONDecodeError:
-                        print(f"Invalid JSON: {line}")
-                        continue
+                    data = self.decode(line)
+                    if data is not None:
+                        yield data
         except FileNotFoundError:
             print(f"Can't read {path}")
 
+    def read_files(self, paths: list[str]) -> None:
+        # Merges logs written separately (simulator --log-separate) into one timeline.
+        # heapq.merge holds one decoded line per file and is stable: equal times come
+        # in the order of given files, then in the order of lines within a file.
+        # Times are compared as strings, so all files must use the same time format.
+        # Plan state (parent task, previous event) is kept per file as plan blocks
+        # of the planner and the leader are written to different files.
+        # A plan block of one file ends (PLAN_CHANGED) as soon as a later line comes
+        # from any file, as it would in the log written as one file.
+        for data in self.iter_merged(paths):
+            self.add_data(data)
+
+    def iter_merged(self, paths: list[str]):
+        # switches the plan state to the file of the line before yielding it
+        for no, data in self.merge_files(paths):
+            self.switch_file(no)
+            yield data
+
+    def merge_files(self, paths: list[str]):
+        # yields (file number, decoded line), the plan state is switched by switch_file()
+        self._contexts = [('', '', {}) for _ in paths]
+        self._current = 0
+        self._pending = set()
+        streams = [self._iter_tagged(no, path) for no, path in enumerate(paths)]
+        return heapq.merge(*streams, key=lambda item: item[1].get('time', ''))
+
+    def switch_file(self, no: int) -> None:
+        if no != self._current:
+            self._contexts[self._current] = (self._state, self._parent_task, self._prev)
+            if self._prev and self._prev['ltip'] == self.NEW_TASK:
+                self._pending.add(self._current)
+            self._state, self._parent_task, self._prev = self._contexts[no]
+            self._pending.discard(no)
+            self._current = no
+
+    def _end_pending_plans(self, time: str) -> None:
+        # plan blocks of other files whose last listed task is older than this line,
+        # ended after the line like the block of the current file
+        for no in sorted(self._pending):
+            state, parent_task, prev = self._contexts[no]
+            if time > prev['time']:
+                self._plan_changed(prev['time'])
+                self._contexts[no] = (state, parent_task, {})
+                self._pending.discard(no)
+
+    def iter_events(self, path: str | list[str]):
+        # Streaming alternative to Parser(path).events: parsed events are yielded
+        # as soon as their line is read and are not kept.
+        lines = self.iter_merged(path) if isinstance(path, list) else self.iter_file(path)
+        for data in lines:
+            self.add_data(data)
+            if self._events:
+                yield from self.take_events()
+
+    def add_matches(self, matches: tuple) -> None:
+        items, invalid, rejected, unparsed = matches
+        self._invalid += invalid
+        self._rejected += rejected
+        self._unparsed += unparsed
+        for res, head in items:
+            self.add_match(res, head)
+
+    # Decodes and matches a batch of raw lines, in a worker process of Pipeline.
+    # Returns (event, line head) of every decoded line with the invalid, rejected and unparsed
+    # counts, for add_matches() to run the stateful part in log order. Heads (time, scope
+    # and tick of the line) are only sent for the tick profile, as results are pickled.
+    @staticmethod
+    def match_lines(lines: list[str], heads: bool = False) -> tuple:
+        if Parser._matcher is None:
+            Parser._matcher = Parser('')
+        parser = Parser._matcher
+        parser._invalid = parser._rejected = parser._unparsed = 0
+        items = []
+        for line in lines:
+            data = parser.decode(line)
+            if data is not None:
+                head = {key: data[key] for key in Parser.HEAD_KEYS if key in data} if heads else None
+                items.append((parser.match_data(data), head))
+        return items, parser._invalid, parser._rejected, parser._unparsed
+
+    def take_events(self) -> list[dict]:
+        events, self._events = self._events, []
+        return events
+
+    def _iter_tagged(self, no: int, path: str):
+        for data in self.iter_file(path):
+            yield no, data
+
+    def decode(self, line: str) -> dict:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            print(f"Invalid JSON: {line}")
+            self._invalid += 1
+            return None
+
+    def add_data(self, data: dict) -> None:
+        self.add_match(self.match_data(data), data)
+
+    def add_match(self, res: dict, data: dict) -> None:
+        # `data` is the decoded line or its head (see match_lines), only read by ticks and merging
+        if res:
+            self._apply(res)
+        ltip = res.get('ltip', '')
+        if self.ticks:
+            # unparsed and filtered lines count in the tick profile too
+            self.ticks.count(ltip, data)
+        if res and (not self.selector or self._select(res)):
+            self._events.append(res)
+        prev = self._prev
+        if prev and prev['ltip'] == self.NEW_TASK and ltip != self.NEW_TASK:
+            self._plan_changed(prev['time'])
+        self._prev = res
+        if self._pending:
+            self._end_pending_plans(data.get('time', ''))
+
+    def _plan_changed(self, time: str) -> None:
+        event = {
+            'ltip': self.PLAN_CHANGED,
+            'time': time,
+        }
+        self._events.append(event)
+        if self.ticks:
+            self.ticks.count(self.PLAN_CHANGED, event)
+
+    def _select(self, event: dict) -> bool:
+        # Filter pushdown: tasks surely rejected by the selector are never materialized.
+        # Their later events are dropped too and their children get `plan_parent`:
+        # the nearest kept ancestor, so Plan and StatusChanged handling still work.
+        task = event.get('task')
+        if not task:
+            return True
+        if task in self._dropped:
+            # like Tracer, the first listing of a task decides
+            self._skipped += 1
+            return False
+        if event['ltip'] != self.NEW_TASK:
+            return True
+        parent = event['parent']
+        if parent in self._dropped:
+            while parent in self._dropped:
+                parent = self._dropped[parent]
+            event['plan_parent'] = parent
+        if self.selector.rejects_task(task, event['optype'], event['scope']):
+            self._dropped[task] = parent
+            self._skipped += 1
+            return False
+        return True
+
     def parse_data(self, data: dict) -> dict:
+        res = self.match_data(data)
+        if res:
+            self._apply(res)
+        return res
+
+    def match_data(self, data: dict) -> dict:
+        # The stateless part of parsing: the event of one line, without symbols and plan state.
         if not self._validate_log_entry(data):
+            self._rejected += 1
             return {}
         for ltip, parsers in self._parsers.items():
             for parser in parsers:
@@ -89,6 +274,24 @@ class Parser:
         self._unparsed += 1
         return {}
 
+    def _apply(self, res: dict) -> None:
+        # The stateful part of parsing, in log order: symbols of the event and the plan state.
+        for key in Parser.SYMBOL_KEYS:
+            if key in res:
+                res[key] = Symbols.intern(res[key])
+        ltip = res['ltip']
+        if ltip == self.NEW_TASK:
+            # every replan lists the same tasks again
+            res['task'] = Symbols.intern(res['task'])
+            res['parent'] = self._parent_task
+        elif ltip == self.DECOMPOSED:
+            self._parent_task = Symbols.intern(res['task'])
+        elif ltip == self.APPEND_PLAN:
+            self._state = self.APPEND_PLAN
+            self._parent_task = ''
+        elif ltip == self.REPLACE_PLAN:
+            self._parent_task = ''
+
     def _validate_log_entry(self, data: dict) -> bool:
         return all(key in data for key in ['scope', 'message', 'time'])
 
@@ -96,8 +299,6 @@ class Parser:
         ms = re.search(r'^APPEND PLAN', data['message'])
         if not ms:
             return {}
-        self._state = self.APPEND_PLAN
-        self._parent_task = ''
         return {
             'time': data['time'],
             'scope': data['scope'],
@@ -108,7 +309,6 @@ class Parser:
         ms = re.search(r'^REPLACE PLAN', data['message'])
         if not ms:
             return {}
-        self._parent_task = ''
         return {
             'time': data['time'],
             'scope': data['scope'],
@@ -120,8 +320,6 @@ class Parser:
         ms = re.search(rf'^DECOMPOSED {self._task_exp}', data['message'])
         if not ms:
             return {}
-
-        self._parent_task = ms.group(1)
         return {
             'task': ms.group(1),
             'time': data['time'],
@@ -141,19 +339,42 @@ class Parser:
         return {
             'task': ms.group('task'),
             'optype': ms.group(2),
-            'parent': self._parent_task,
-            'origin': ms.groupdict().get('orgn', ''),
-            'args': self.parse_args(ms.group('args')),
-            'pres': self.parse_pres(ms.group('pres')),
+            'parent': '',
+            'origin': ms.groupdict().get('orgn') or '',
+            'args': ms.group('args'),
+            'pres': ms.group('pres'),
             'no': ms.group(1),
             'time': data['time'],
             'scope': data['scope'],
             'tick': data.get('tick', 0)
         }
 
+    def unpack(self, data: dict) -> dict:
+        # NewTask args and preconditions are kept raw until the task is actually used,
+        # as replans repeat the same task lines over and over
+        if not isinstance(data.get('args'), dict):
+            data['args'] = self.parse_args(data.get('args'))
+        if not isinstance(data.get('pres'), dict):
+            data['pres'] = self.parse_pres(data.get('pres'))
+        return data
+
+    @staticmethod
+    def _memoize(cache: dict, input: str, res: dict) -> dict:
+        if len(cache) >= Parser.CACHE_SIZE:
+            cache.clear()
+        cache[input] = res
+        return res
+
     def parse_args(self, input: str) -> dict:
+        # parsed args are memoized by raw text and shared between events, don't modify them
         if not input:
             return {}
+        res = Parser._args_cache.get(input)
+        if res is None:
+            res = Parser._memoize(Parser._args_cache, input, self._parse_args(input))
+        return res
+
+    def _parse_args(self, input: str) -> dict:
         res = {}
 
         # e=[0.01500, 0.02500]
@@ -171,29 +392,30 @@ class Parser:
             except ValueError:
                 key = f'arg{i}'
                 value = arg
-            res[key.strip()] = value.strip()
+            key = Symbols.intern(key.strip())
+            res[key] = Symbols.intern_value(key, value.strip())
         return res
 
     def render_args(self, args: dict) -> str:
-        res = ''
-        for k, v in args.items():
-            if k == 'arg0':
-                return ' '.join(args.values())
-            if res:
-                res += ', '
-            res += f'{k}={v}'
-        return res
+        if 'arg0' in args:
+            return ' '.join(args.values())
+        return ', '.join(f'{k}={v}' for k, v in args.items())
 
     def parse_pres(self, input: str) -> dict:
         # Pre: `RUN_AFTER(task=MARK_GROUP_ACTIVE.3p.1d)`, `IS_MESSAGE_GROUP_ACTIVE(fmID=870000000082862, groupID=47d113d4-c79b-42f7-8e24-17ffde564356)`
         if not input:
             return {}
+        res = Parser._pres_cache.get(input)
+        if res is None:
+            res = Parser._memoize(Parser._pres_cache, input, self._parse_pres(input))
+        return res
 
+    def _parse_pres(self, input: str) -> dict:
         res = {}
         pres = input.strip('`').split('`, `')
         for i in range(len(pres)):
             vs = self.parse_pre(pres[i])
-            res[f'{i}.{vs["name"]}'] = vs['args']
+            res[Symbols.intern(f'{i}.{vs["name"]}')] = vs['args']
         return res
 
     def parse_pre(self, input: str) -> dict:
@@ -205,17 +427,12 @@ class Parser:
         if not ms:
             raise ValueError(f"Invalid precondition format: {input}")
         return {
-            'name': ms.group('name'),
+            'name': Symbols.intern(ms.group('name')),
             'args': self.parse_args(ms.group('args')),
         }
 
     def render_pres(self, pres: dict) -> str:
-        res = ''
-        for k, v in pres.items():
-            if res:
-                res += ', '
-            res += '`' + self.render_pre(k, v) + '`'
-        return res
+        return ', '.join('`' + self.render_pre(k, v) + '`' for k, v in pres.items())
 
     def render_pre(self, key: str, args: dict) -> str:
         arg = self.render_args(args)
@@ -307,6 +524,8 @@ class Parser:
 
     def dump(self) -> None:
         for item in self._events:
+            if item.get('ltip') == self.NEW_TASK:
+                self.unpack(item)
             ltip = item.get('ltip')
             del item['ltip']
             print(f'{ltip:>20}: {item}')
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import queue
+import threading
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from CT import CT
+from Trace import Trace
+from Parser import Parser
+from Tracer import Tracer
+
+# Runs the parse -> trace -> export steps of one session as concurrent stages:
+#   reader thread -> parser thread (+ `jobs` processes) -> Tracer (calling thread) -> sink thread
+# Stages hand batches over bounded queues, so a fast stage waits for a slow one
+# instead of buffering the whole log (backpressure).
+# - the reader reads raw lines (or decodes and merges lines of several logs)
+# - with jobs > 1, batches of raw lines are decoded and matched (Parser.match_lines) in
+#   worker processes, at most `depth` batches ahead; the parser thread runs the stateful
+#   part of Parser (plan state, PLAN_CHANGED, pushdown, ticks) on the results in log order.
+#   Merged logs are decoded by the reader and matched in the parser thread.
+# - Tracer turns events into traces
+# - the sink selects traces of the main export and converts them to CT events as they come.
+#   Lanes and downsampling need all traces, so they run when the stream ends, then slices
+#   off lane 0 and aggregates are converted. The actions export and later exports of the
+#   session reuse the arranged traces.
+# Threads share one core, so stages other than the worker processes don't add CPU.
+class Pipeline:
+    BATCH = 2000
+    DEPTH = 16
+    READ_HINT = 1 << 20
+
+    def __init__(self, path: str | list[str], stats=None, selector=None, ticks=None, jobs: int = 1,
+                 batch: int = BATCH, depth: int = DEPTH):
+        self.path = path
+        self.stats = stats
+        self.jobs = jobs
+        self.batch = batch
+        self.depth = depth
+        self.parser = Parser('', stats=stats, selector=selector, ticks=ticks)
+        self.events = 0
+        self._stop = threading.Event()
+        self._error = None
+
+    def run(self, filename: str, export: bool = True, **kwargs) -> Tracer:
+        lines = queue.Queue(self.depth)
+        events = queue.Queue(self.depth)
+        traces = queue.Queue(self.depth)
+        if isinstance(self.path, list):
+            reader = threading.Thread(target=self._stage, args=(self._read_merged, None, lines), daemon=True)
+        else:
+            reader = threading.Thread(target=self._stage, args=(self._read, None, lines), daemon=True)
+        if self.jobs > 1 and not isinstance(self.path, list):
+            parser = threading.Thread(target=self._stage, args=(self._parse_pooled, lines, events), daemon=True)
+        else:
+            parser = threading.Thread(target=self._stage, args=(self._parse, lines, events), daemon=True)
+        tracer = Tracer([], stats=self.stats, **kwargs)
+        sink = threading.Thread(target=self._stage, args=(self._sink, traces, None), kwargs={'filename': filename, 'tracer': tracer, 'export': export}, daemon=True)
+        for thread in [reader, parser, sink]:
+            thread.start()
+        res = []
+        try:
+            batch = []
+            for trace in tracer.iterate(self._receive(events)):
+                res.append(trace)
+                batch.append(trace)
+                if len(batch) >= self.batch:
+                    self._put(traces, batch)
+                    batch = []
+            self._put(traces, batch)
+            tracer.traces = res
+            self._put(traces, None)
+        except _Stopped:
+            raise self._error
+        except BaseException:
+            self._stop.set()
+            raise
+        sink.join()
+        if self._error:
+            raise self._error
+        if self.stats:
+            self.stats.add_parser(self.parser, self.events)
+        return tracer
+
+    def _stage(self, fn, inbox, outbox, **kwargs) -> None:
+        try:
+            fn(self._receive_batches(inbox) if inbox else None, outbox, **kwargs)
+            if outbox:
+                self._put(outbox, None)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._error = e
+            self._stop.set()
+            if outbox:
+                # wakes up the consumer, which then stops on the error
+                try:
+                    outbox.put_nowait(_FAILED)
+                except queue.Full:
+                    pass
+
+    def _put(self, outbox: queue.Queue, item) -> None:
+        while True:
+            try:
+                outbox.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    raise _Stopped()
+
+    def _receive_batches(self, inbox: queue.Queue):
+        while True:
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise _Stopped()
+                continue
+            if item is None:
+                return
+            if item is _FAILED:
+                raise _Stopped()
+            yield item
+
+    def _receive(self, inbox: queue.Queue):
+        try:
+            for batch in self._receive_batches(inbox):
+                yield from batch
+        except _Stopped:
+            if self._error:
+                raise self._error
+            raise
+
+    def _read(self, _, outbox: queue.Queue) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                while True:
+                    lines = f.readlines(Pipeline.READ_HINT)
+                    if not lines:
+                        break
+                    self._put(outbox, lines)
+        except FileNotFoundError:
+            print(f"Can't read {self.path}")
+
+    def _read_merged(self, _, outbox: queue.Queue) -> None:
+        # merging needs the time of every line, so lines are decoded here
+        batch = []
+        for item in self.parser.merge_files(self.path):
+            batch.append(item)
+            if len(batch) >= self.batch:
+                self._put(outbox, batch)
+                batch = []
+        self._put(outbox, batch)
+
+    def _parse(self, inbox, outbox: queue.Queue) -> None:
+        parser = self.parser
+        merged = isinstance(self.path, list)
+        for batch in inbox:
+            for item in batch:
+                if merged:
+                    parser.switch_file(item[0])
+                    parser.add_data(item[1])
+                    continue
+                data = parser.decode(item)
+                if data is not None:
+                    parser.add_data(data)
+            self._put_events(outbox)
+
+    def _parse_pooled(self, inbox, outbox: queue.Queue) -> None:
+        # workers are spawned, as forking a process running threads is unsafe
+        pending = collections.deque()
+        with ProcessPoolExecutor(self.jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for lines in inbox:
+                pending.append(pool.submit(Parser.match_lines, lines, bool(self.parser.ticks)))
+                if len(pending) >= self.depth:
+                    self.parser.add_matches(pending.popleft().result())
+                    self._put_events(outbox)
+            while pending:
+                self.parser.add_matches(pending.popleft().result())
+                self._put_events(outbox)
+
+    def _put_events(self, outbox: queue.Queue) -> None:
+        events = self.parser.take_events()
+        if events:
+            self.events += len(events)
+            self._put(outbox, events)
+
+    def _sink(self, inbox, _, filename: str, tracer: Tracer, export: bool) -> None:
+        selected = []
+        events = {}
+        for batch in inbox:
+            for trace in batch:
+                if Tracer.selector.accepts(trace):
+                    selected.append(trace)
+                    if export:
+                        events[id(trace)] = CT.X(trace)
+        selected = Tracer.arrange_traces(selected)
+        tracer.set_selected(selected)
+        if not export:
+            return
+        # slices were converted on lane 0
+        cts = [events[id(t)] if id(t) in events and not CT.trace2tid(t) else CT.X(t) for t in selected]
+        actions = [(t, e) for t, e in zip(selected, cts) if t.get('optype') == Trace.ACTION]
+        # counters are complete only when Tracer is done
+        Tracer.write_traces(selected, f'{filename}.json', tracer.counter_events(), cts)
+        Tracer.write_traces([t for t, _ in actions], f'{filename}-actions.json', events=[e for _, e in actions])
+
+class _Stopped(Exception):
+    pass
+
+_FAILED = object()
@@ -18,34 +18,57 @@ class Plan:
             self.add_task(task)
 
     def add_task(self, task: dict):
-        name = task['task']
-        if name in self.tasks:
-            return
-
-        self.tasks[name] = task
-
-        parent = task.get('parent', '')
-        if parent not in self.tree:
-            self.tree[parent] = []
-            self.parents[parent] = 1
-        if parent and parent not in self.tasks:
-            parent_task = self.tracer.get_task(parent)
-            if not parent_task:
+        # walks up the parent chain until a known task, then links the chain top down
+        chain = []
+        while task['task'] not in self.tasks:
+            name = task['task']
+            self.tasks[name] = task
+            chain.append(task)
+            parent = Plan.parent(task)
+            if parent not in self.tree:
+                self.tree[parent] = []
+                self.parents[parent] = 1
+            if not parent or parent in self.tasks:
+                break
+            task = self.tracer.get_task(parent)
+            if not task:
                 raise ValueError(f'Parent task {parent} not found for task {name}')
-            self.add_task(parent_task)
-        self.tree[parent].append(task)
+        for task in reversed(chain):
+            self.tree[Plan.parent(task)].append(task)
+
+    @staticmethod
+    def parent(task: dict) -> str:
+        return task.get('plan_parent', task.get('parent', ''))
 
     def render(self):
         return f'{len(self.tasks)} tasks\n' + self.render_subtree()
 
     def render_subtree(self, parent='', depth=0):
-        res = ''
-        for task in self.tree.get(parent, []):
-            args = self.render_args(task.get('args', {}))
-            pres = self.render_pres(task.get('pres', {}))
-            res += ' ' * 2 * depth + f'[{task["optype"]}] {task["task"]}{args}{pres}\n'
-            res += self.render_subtree(task['task'], depth + 1)
-        return res
+        lines = []
+        stack = [(task, depth) for task in reversed(self.tree.get(parent, []))]
+        while stack:
+            task, depth = stack.pop()
+            lines.append(' ' * 2 * depth + self.render_task(task))
+            stack.extend((child, depth + 1) for child in reversed(self.tree.get(task['task'], [])))
+        return ''.join(lines)
+
+    def render_task(self, task: dict) -> str:
+        args = self.render_args(task.get('args', {}))
+        pres = self.render_pres(task.get('pres', {}))
+        return f'[{task["optype"]}] {task["task"]}{args}{pres}\n'
+
+    def render_delta(self, added: dict, removed: dict) -> str:
+        # + added, - removed, ~ removed and listed again within the same plan change
+        lines = []
+        for name, task in removed.items():
+            if name not in added:
+                lines.append('- ' + self.render_task(task))
+        for name, task in added.items():
+            mark = '~ ' if name in removed else '+ '
+            parent = Plan.parent(task)
+            line = self.render_task(task)
+            lines.append(mark + (f'{line[:-1]} < {parent}\n' if parent else line))
+        return ''.join(lines)
 
     def render_args(self, args: dict) -> str:
         if not args:
@@ -63,3 +86,20 @@ class Plan:
         print(f'tree: {json.dumps(self.tree, indent=2)}')
         print()
         print(f'parents: {json.dumps(self.parents, indent=2)}')
+
+# Writes every plan change as a delta from the previous one.
+# Pass it as Tracer(events, on_plan_changed=PlanDeltas(f)).
+class PlanDeltas:
+    def __init__(self, f):
+        self.f = f
+        self.plan = None
+        self.no = 0
+
+    def __call__(self, tracer, time: str, added: dict, removed: dict):
+        if not self.plan:
+            self.plan = Plan(tracer)
+        self.no += 1
+        changed = sum(1 for task in added if task in removed)
+        self.f.write(f'Plan changed No. {self.no} at {time}: '
+                     f'+{len(added) - changed} -{len(removed) - changed} ~{changed}, {len(tracer.tasks)} tasks\n')
+        self.f.write(self.plan.render_delta(added, removed))
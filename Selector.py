@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+from Trace import Trace
+from Symbols import Symbols
+
+# Include/exclude rules by trace type, agent, scope or optype.
+# - accepts() checks a ready Trace and is used at export time
+# - rejects_task() is the pushdown used by Parser on NewTask lines: it says True only
+#   when no trace of the task can be accepted, judging by what is known before parsing args:
+#   type from the task id (except DISP_MSG whose type is its kind), scope and optype
+#   (a task may also produce an action trace with optype A)
+class Selector:
+    FIELDS = ['type', 'agent', 'scope', 'optype']
+    PERIODIC = ['SOLVE_MAPF', 'CHECK_SELF_CONTROL_REQS', 'CHECK_ROBOT_BATTERIES', 'INCREMENT_THROUGHPUT']
+
+    def __init__(self, include: dict = None, exclude: dict = None):
+        self.include = {}
+        self.exclude = {}
+        for field, values in (include or {}).items():
+            self.add('include', field, values)
+        for field, values in (exclude or {}).items():
+            self.add('exclude', field, values)
+
+    @staticmethod
+    def default() -> 'Selector':
+        return Selector(exclude={'type': Selector.PERIODIC})
+
+    def add(self, kind: str, field: str, values: list[str]) -> None:
+        if field not in Selector.FIELDS:
+            raise ValueError(f"Unknown field '{field}', expected one of {Selector.FIELDS}")
+        rules = self.include if kind == 'include' else self.exclude
+        rules.setdefault(field, set()).update(values)
+
+    def add_rule(self, kind: str, rule: str) -> None:
+        # type=SOLVE_MAPF,CHECK_ROBOT_BATTERIES
+        field, _, values = rule.partition('=')
+        self.add(kind, field.strip(), [v.strip() for v in values.split(',') if v.strip()])
+
+    def discard(self, field: str, values: list[str]) -> None:
+        if field in self.exclude:
+            self.exclude[field].difference_update(values)
+
+    def check(self, field: str, value: str) -> bool:
+        if field in self.exclude and value in self.exclude[field]:
+            return False
+        if field in self.include and value not in self.include[field]:
+            return False
+        return True
+
+    def accepts(self, trace: Trace) -> bool:
+        data = trace.data
+        for field in Selector.FIELDS:
+            if not self.check(field, data.get(field, '')):
+                return False
+        return True
+
+    def rejects_task(self, task: str, optype: str, scope: str) -> bool:
+        type = Symbols.task2type(task)
+        if type != 'DISP_MSG' and not self.check('type', type):
+            return True
+        if not self.check('scope', scope):
+            return True
+        return not self.check('optype', optype) and not self.check('optype', Trace.ACTION)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import json
+import bisect
+import asyncio
+import urllib.parse
+
+from CT import CT
+from Trace import Trace
+from Tracer import Tracer
+from Filter import FindChildren, FindRelated
+
+# Local HTTP server answering trace queries from a session parsed once.
+# Every query returns Chrome Trace JSON streamed in chunks:
+# - /window?start=T&finish=T        slices overlapping the time window
+# - /subtree?task=TASK[&related=1]  FindChildren (or FindRelated) of the task
+# - /agent?agent=RS1                slices of the agent
+# - /type?type=SOLVE_MAPF           slices of the type (periodic types are served with --all or --downsample)
+# - /plan?at=T                      tasks in the plan at the moment
+# Times are ISO strings as in the log or microseconds.
+# Indexes and encoded events are kept in memory, so queries take milliseconds after the first load.
+# Queries and encoding run in the default executor, the event loop only writes the chunks.
+class Server:
+    CHUNK = 1000
+
+    def __init__(self, tracer: Tracer, host: str = '127.0.0.1', port: int = 8765):
+        self.tracer = tracer
+        self.host = host
+        self.port = port
+        self.traces = sorted(tracer.selected(), key=lambda t: t.get_ms('start'))
+        self.starts = [t.get_ms('start') for t in self.traces]
+        self.finishes = [t.get_ms('finish') for t in self.traces]
+        self.max_dur = max((f - s for s, f in zip(self.starts, self.finishes)), default=0)
+        self.by_agent = {}
+        self.by_type = {}
+        for no, trace in enumerate(self.traces):
+            self.by_agent.setdefault(trace.get('agent'), []).append(no)
+            self.by_type.setdefault(trace.get('type'), []).append(no)
+        self._encoded = [None] * len(self.traces)
+        self._subtrees = {}
+        self._routes = {
+            '/window':  self.query_window,
+            '/subtree': self.query_subtree,
+            '/agent':   self.query_agent,
+            '/type':    self.query_type,
+            '/plan':    self.query_plan,
+        }
+
+    def run(self) -> None:
+        asyncio.run(self.serve())
+
+    async def serve(self) -> None:
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f"Serving {len(self.traces)} traces on http://{self.host}:{self.port}/")
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request.decode('latin-1').split()
+            if len(parts) < 2 or parts[0] != 'GET':
+                await self.respond(writer, 405, {'error': 'Only GET is supported'})
+                return
+            url = urllib.parse.urlsplit(parts[1])
+            route = self._routes.get(url.path)
+            if not route:
+                await self.respond(writer, 404, {'error': 'Unknown query', 'queries': list(self._routes)})
+                return
+            params = dict(urllib.parse.parse_qsl(url.query))
+            loop = asyncio.get_running_loop()
+            try:
+                found = await loop.run_in_executor(None, route, params)
+            except (KeyError, ValueError) as e:
+                await self.respond(writer, 400, {'error': f'Bad query: {e}'})
+                return
+            await self.stream(writer, found)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        writer.write(Server.head(status, f'Content-Length: {len(body)}') + body)
+        await writer.drain()
+
+    async def stream(self, writer: asyncio.StreamWriter, found: list[int]) -> None:
+        loop = asyncio.get_running_loop()
+        writer.write(Server.head(200, 'Transfer-Encoding: chunked'))
+        Server.write_chunk(writer, b'{"traceEvents":[')
+        for i in range(0, len(found), Server.CHUNK):
+            chunk = await loop.run_in_executor(None, self.encode_chunk, found[i:i + Server.CHUNK])
+            Server.write_chunk(writer, chunk if i == 0 else b',' + chunk)
+            await writer.drain()
+        Server.write_chunk(writer, b'],"displayTimeUnit":"ms"}')
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    @staticmethod
+    def head(status: int, header: str) -> bytes:
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+        return (f'HTTP/1.1 {status} {reasons[status]}\r\n'
+                f'Content-Type: application/json\r\n{header}\r\nConnection: close\r\n\r\n').encode()
+
+    @staticmethod
+    def write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+
+    def encode_chunk(self, found: list[int]) -> bytes:
+        return b','.join(self.encode(no) for no in found)
+
+    def encode(self, no: int) -> bytes:
+        # executor threads may encode the same trace, both store equal bytes
+        res = self._encoded[no]
+        if res is None:
+            res = json.dumps(CT.X(self.traces[no]), separators=(',', ':')).encode()
+            self._encoded[no] = res
+        return res
+
+    @staticmethod
+    def parse_time(value: str) -> int:
+        return int(value) if value.isdigit() else Trace.time2ms(value)
+
+    def overlapping(self, start: int, finish: int) -> list[int]:
+        lo = bisect.bisect_left(self.starts, start - self.max_dur)
+        hi = bisect.bisect_right(self.starts, finish)
+        return [no for no in range(lo, hi) if self.finishes[no] >= start]
+
+    def query_window(self, params: dict) -> list[int]:
+        return self.overlapping(Server.parse_time(params['start']), Server.parse_time(params['finish']))
+
+    def query_plan(self, params: dict) -> list[int]:
+        at = Server.parse_time(params['at'])
+        return [no for no in self.overlapping(at, at)
+                if self.traces[no].get('optype') != Trace.ACTION and self.finishes[no] > at]
+
+    def query_agent(self, params: dict) -> list[int]:
+        return self.by_agent.get(params['agent'], [])
+
+    def query_type(self, params: dict) -> list[int]:
+        return self.by_type.get(params['type'], [])
+
+    def query_subtree(self, params: dict) -> list[int]:
+        key = (params['task'], params.get('related', '') not in ('', '0'))
+        if key not in self._subtrees:
+            finder = FindRelated(self.tracer) if key[1] else FindChildren(self.tracer)
+            finder.start(key[0])
+            self._subtrees[key] = [no for no, trace in enumerate(self.traces) if trace.task in finder.tasks]
+        return self._subtrees[key]
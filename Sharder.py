@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import heapq
+import bisect
+from concurrent.futures import ProcessPoolExecutor
+
+from CT import CT
+from Trace import Trace
+
+# Splits one huge Chrome Trace export into several viewer-sized files.
+# - shards are cut on time boundaries so that each holds about `max_events` slices
+#   or about `max_bytes` of JSON, counting slices clipped into the shard
+# - events are encoded once, as they are written (indented or compact), and the
+#   shard sizes come from the encoded events; shards over `max_bytes` are reported
+# - a slice crossing a boundary is clipped into every shard it overlaps, and every
+#   counter track starts a shard with its last value before it, so every shard
+#   can be opened on its own
+# - `{filename}-manifest.json` lists the shard files with their time ranges
+class Sharder:
+    CHUNK = 10000
+
+    def __init__(self, max_events: int = 0, max_bytes: int = 0, jobs: int = 1, compact: bool = False):
+        if not max_events and not max_bytes:
+            raise ValueError('Either max_events or max_bytes must be given')
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.jobs = jobs
+        self.compact = compact
+
+    def export(self, traces: list[Trace], filename: str, counters: list[dict] = None) -> dict:
+        events = [CT.X(trace) for trace in traces] + (counters or [])
+        events.sort(key=lambda e: e.get('ts', 0))
+        shards = self.split(events, self.encode(events))
+        paths = [f'{filename}-{no:04d}.json' for no in range(len(shards))]
+        for path, shard in zip(paths, shards):
+            Sharder.write_shard(path, shard['events'], self.compact)
+        if self.max_bytes:
+            over = [shard for shard in shards if shard['bytes'] > self.max_bytes]
+            if over:
+                print(f"{len(over)} of {len(shards)} shards are over {self.max_bytes} bytes, "
+                      f"the largest has {max(shard['bytes'] for shard in over)} bytes")
+        manifest = self.build_manifest(paths, shards)
+        output_path = f'{filename}-manifest.json'
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        print(f"Manifest of {len(shards)} shards exported to {output_path}")
+        return manifest
+
+    def encode(self, events: list[dict]) -> list[str]:
+        if self.jobs > 1 and len(events) > Sharder.CHUNK:
+            chunks = [events[i:i + Sharder.CHUNK] for i in range(0, len(events), Sharder.CHUNK)]
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                return [e for chunk in pool.map(Sharder.encode_events, chunks, [self.compact] * len(chunks)) for e in chunk]
+        return Sharder.encode_events(events, self.compact)
+
+    # Events as they appear in the traceEvents array of a shard file.
+    @staticmethod
+    def encode_events(events: list[dict], compact: bool) -> list[str]:
+        if compact:
+            return [json.dumps(e, separators=(',', ':')) for e in events]
+        return ['    ' + json.dumps(e, indent=2).replace('\n', '\n    ') for e in events]
+
+    def bounds(self, starts: list[int], finishes: list[int], sizes: list[int], clipped: int, frame: int) -> list[int]:
+        # A new shard starts when the next slice doesn't fit. Slices reaching past the boundary
+        # are clipped in the shard and copied into the next one, so they count in both.
+        res = [starts[0]]
+        count = 0
+        size = frame
+        ends = []
+        for start, finish, event_size in zip(starts, finishes, sizes):
+            while ends and ends[0][0] <= start:
+                heapq.heappop(ends)
+            if start > res[-1] and (self.max_events and count >= self.max_events or
+                                    self.max_bytes and count and
+                                    size + event_size + clipped * (len(ends) + 1) > self.max_bytes):
+                res.append(start)
+                count = len(ends)
+                size = frame + sum(s for _, s in ends) + clipped * count
+            count += 1
+            size += event_size
+            if finish > start:
+                heapq.heappush(ends, (finish, event_size))
+        res.append(max(finishes) + 1)
+        return res
+
+    def split(self, events: list[dict], encoded: list[str]) -> list[dict]:
+        if not events:
+            return []
+        separator = 1 if self.compact else 2
+        starts = [e.get('ts', 0) for e in events]
+        finishes = [s + e.get('dur', 0) for s, e in zip(starts, events)]
+        sizes = [len(e) + separator for e in encoded]
+        # a clipped copy is about as long as the slice and its clipped arg
+        first = events[0]
+        clipped = len(Sharder.encode_events([Sharder.clip(first, starts[0], finishes[0])], self.compact)[0]) - len(encoded[0])
+        # counter values carried into a shard are as long as the longest sample of their track
+        counters = [i for i, e in enumerate(events) if e.get('ph') == 'C']
+        carried = {}
+        for i in counters:
+            key = (events[i].get('pid', 0), events[i]['name'])
+            carried[key] = max(carried.get(key, 0), sizes[i])
+        frame = Sharder.file_size([], self.compact) + sum(carried.values())
+        bounds = self.bounds(starts, finishes, sizes, max(clipped, 0), frame)
+
+        shards = [{'start': bounds[i], 'finish': bounds[i + 1], 'events': [], 'bytes': 0} for i in range(len(bounds) - 1)]
+        for start, finish, event, text in zip(starts, finishes, events, encoded):
+            no = bisect.bisect_right(bounds, start) - 1
+            if finish <= bounds[no + 1]:
+                shards[no]['events'].append(text)
+                continue
+            while no < len(shards) and bounds[no] < finish:
+                clip = Sharder.clip(event, bounds[no], bounds[no + 1])
+                shards[no]['events'].append(Sharder.encode_events([clip], self.compact)[0])
+                no += 1
+        self.carry(events, counters, bounds, shards)
+        for shard in shards:
+            shard['bytes'] = Sharder.file_size(shard['events'], self.compact)
+        return shards
+
+    def carry(self, events: list[dict], counters: list[int], bounds: list[int], shards: list[dict]) -> None:
+        # counter samples before a shard are carried to its start, unless the track has a sample there
+        last = {}
+        i = 0
+        for no, shard in enumerate(shards):
+            while i < len(counters) and events[counters[i]]['ts'] <= bounds[no]:
+                event = events[counters[i]]
+                last[(event.get('pid', 0), event['name'])] = event
+                i += 1
+            values = [dict(event, ts=bounds[no]) for event in last.values() if event['ts'] < bounds[no]]
+            if values:
+                shard['events'][:0] = Sharder.encode_events(values, self.compact)
+
+    @staticmethod
+    def clip(event: dict, start: int, finish: int) -> dict:
+        res = event.copy()
+        ts = max(event.get('ts', 0), start)
+        res['ts'] = ts
+        res['dur'] = min(event.get('ts', 0) + event.get('dur', 0), finish) - ts
+        res['args'] = event.get('args', {}).copy()
+        res['args']['clipped'] = True
+        return res
+
+    @staticmethod
+    def file_size(events: list[str], compact: bool) -> int:
+        head, tail, separator = Sharder.frame(compact, bool(events))
+        return len(head) + len(tail) + sum(len(e) for e in events) + len(separator) * max(len(events) - 1, 0)
+
+    @staticmethod
+    def frame(compact: bool, events: bool) -> tuple:
+        # the same bytes as json.dump of the shard with the writer's separators or indent=2
+        if compact:
+            return '{"traceEvents":[', '],"displayTimeUnit":"ms"}', ','
+        if events:
+            return '{\n  "traceEvents": [\n', '\n  ],\n  "displayTimeUnit": "ms"\n}', ',\n'
+        return '{\n  "traceEvents": [', '],\n  "displayTimeUnit": "ms"\n}', ',\n'
+
+    @staticmethod
+    def write_shard(path: str, events: list[str], compact: bool = False) -> None:
+        head, tail, separator = Sharder.frame(compact, bool(events))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(head)
+            f.write(separator.join(events))
+            f.write(tail)
+
+    def build_manifest(self, paths: list[str], shards: list[dict]) -> dict:
+        res = []
+        for path, shard in zip(paths, shards):
+            res.append({
+                'file': os.path.basename(path),
+                'start': Trace.ms2time(shard['start']),
+                'finish': Trace.ms2time(shard['finish']),
+                'ts': shard['start'],
+                'dur': shard['finish'] - shard['start'],
+                'events': len(shard['events']),
+                'bytes': shard['bytes'],
+            })
+        return {'shards': res}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import json
+import time
+import cProfile
+import contextlib
+import tracemalloc
+
+from CT import CT
+from Trace import Trace
+from Symbols import Symbols
+
+# Optional hot-path instrumentation.
+# Parser and Tracer wrap their hot methods with Stats.wrap only when stats are enabled,
+# so a disabled Stats costs nothing: the original methods are called directly.
+# Collected:
+# - stages: wall time, calls and hits (truthy results) per stage or per ltip parser
+# - counters: plain numbers like rejected lines
+# - series: sampled values over log time, exported as Chrome Trace counter tracks
+class Stats:
+    def __init__(self, enabled: bool = True, sample_every: int = 100):
+        self.enabled = enabled
+        self.sample_every = sample_every
+        self.stages = {}
+        self.counters = {}
+        self.series = {}
+        self.allocations = []
+
+    def _stage(self, name: str) -> list:
+        if name not in self.stages:
+            self.stages[name] = [0.0, 0, 0]
+        return self.stages[name]
+
+    def wrap(self, name: str, fn):
+        stage = self._stage(name)
+        def timed(*args):
+            started = time.perf_counter()
+            res = fn(*args)
+            stage[0] += time.perf_counter() - started
+            stage[1] += 1
+            if res:
+                stage[2] += 1
+            return res
+        return timed
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed_stage(name)
+
+    @contextlib.contextmanager
+    def _timed_stage(self, name: str):
+        stage = self._stage(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage[0] += time.perf_counter() - started
+            stage[1] += 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def sample(self, name: str, at: str, value: int) -> None:
+        series = self.series.setdefault(name, [])
+        if not series or series[-1][1] != value:
+            series.append((at, value))
+
+    def add_parser(self, parser, events: int = None) -> None:
+        self.count('parser.events', len(parser.events) if events is None else events)
+        self.count('parser.unparsed', parser.unparsed)
+        self.count('parser.rejected', parser.rejected)
+        self.count('parser.invalid', parser.invalid)
+        self.count('parser.skipped', parser.skipped)
+        self.counters['symbols'] = Symbols.size()
+
+    @contextlib.contextmanager
+    def profile(self, path: str = '', memory: bool = False, top: int = 10):
+        profiler = cProfile.Profile() if path else None
+        if memory:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(path)
+                print(f"Profile saved to {path}")
+            if memory:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.counters['tracemalloc.peak'] = peak
+                self.allocations = [str(stat) for stat in snapshot.statistics('lineno')[:top]]
+
+    def regex_attempts(self) -> float:
+        attempts, hits = 0, 0
+        for name, (_, calls, matched) in self.stages.items():
+            if name.startswith('parser.') and name.count('.') == 2:
+                attempts += calls
+                hits += matched
+        return attempts / hits if hits else 0
+
+    def to_dict(self) -> dict:
+        return {
+            'stages': {name: {'time': spent, 'calls': calls, 'hits': hits}
+                       for name, (spent, calls, hits) in self.stages.items()},
+            'counters': self.counters,
+            'regex_attempts_per_line': self.regex_attempts(),
+            'series': {name: {'samples': len(values), 'max': max(v for _, v in values)}
+                       for name, values in self.series.items() if values},
+            'allocations': self.allocations,
+        }
+
+    def render(self) -> str:
+        res = f"{'stage':<50} {'time':>9} {'calls':>10} {'hits':>10}\n"
+        for name, (spent, calls, hits) in self.stages.items():
+            res += f'{name:<50} {spent:>9.3f} {calls:>10} {hits:>10}\n'
+        for name, value in self.counters.items():
+            res += f'{name:<50} {value:>9}\n'
+        res += f"{'regex attempts per matched line':<50} {self.regex_attempts():>9.2f}\n"
+        for name, values in self.series.items():
+            if values:
+                res += f'{name:<50} max {max(v for _, v in values)} in {len(values)} samples\n'
+        for line in self.allocations:
+            res += f'{line}\n'
+        return res
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Stats saved to {path}")
+
+    def counter_events(self) -> list[dict]:
+        res = []
+        for name, values in self.series.items():
+            for at, value in values:
+                res.append(CT.C(name, Trace.time2ms(at), {name: value}))
+        return res
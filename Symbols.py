@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import re
+
+# Symbol table shared by Parser, Trace and CT.
+# Task ids of plan lines, arg keys, types, agent names, scopes, statuses and precondition names
+# repeat millions of times in a log. Every distinct string of them is stored once, and attributes
+# derived from a symbol (type from task id, pid from agent name) are computed once and cached.
+# Arg values such as msgID or node ids are mostly unique, so they are not interned.
+# The tables hold one session: call clear() before parsing the next one in the same process.
+class Symbols:
+    # arg keys whose values are interned, values of other keys are ids
+    VALUE_KEYS = {'kind', 'status', 'agentID', 'agentId', 'type'}
+
+    _strings = {}
+    _prefixes = {}
+    _pids = {}
+
+    @staticmethod
+    def intern(s: str) -> str:
+        return Symbols._strings.setdefault(s, s)
+
+    @staticmethod
+    def intern_value(key: str, value: str) -> str:
+        return Symbols.intern(value) if key in Symbols.VALUE_KEYS else value
+
+    @staticmethod
+    def task2type(task: str) -> str:
+        # The type only depends on the task id without its last part when the last part starts
+        # with a word character, so ids of one prefix share a cache entry.
+        prefix, _, last = task.rpartition('.')
+        cached = prefix and last[:1] and (last[0].isalnum() or last[0] in '_+')
+        if cached:
+            type = Symbols._prefixes.get(prefix)
+            if type is not None:
+                return type
+        ms = re.search(r'(\w+)\.(\w+)\.([\w\+]+)', task)
+        if not ms:
+            return task
+        type = Symbols.intern(ms.group(1))
+        if cached:
+            Symbols._prefixes[prefix] = type
+        return type
+
+    @staticmethod
+    def agent2pid(agent: str) -> int:
+        pid = Symbols._pids.get(agent)
+        if pid is None:
+            ms = re.search(r'(\d+)$', agent)
+            pid = int(ms.group(1)) if ms else 0
+            Symbols._pids[agent] = pid
+        return pid
+
+    @staticmethod
+    def size() -> int:
+        return len(Symbols._strings)
+
+    @staticmethod
+    def clear() -> None:
+        Symbols._strings.clear()
+        Symbols._prefixes.clear()
+        Symbols._pids.clear()
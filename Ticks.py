@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import json
+
+from CT import CT
+from Trace import Trace
+from Parser import Parser
+
+# Planner profile collected while the log is parsed and the traces are prepared, in the same pass.
+# - per tick, counted by Parser from every decoded line, recognized or not: planning wall time
+#   from the first to the last planner line, planner lines, replans (APPEND/REPLACE PLAN),
+#   decompositions and plan changes
+# - counter tracks of the live plan size, pending actions and busy agents, sampled by Tracer
+#   on every change and exported as Chrome Trace "C" events
+# Pass the same object as Parser(path, ticks=ticks) and Tracer(events, ticks=ticks),
+# with events parsed without filter pushdown so that the live plan is complete.
+class Ticks:
+    PLANNER_SCOPE = '/planner'
+    SERIES = ['live plan', 'pending actions', 'busy agents']
+
+    def __init__(self, budget_ms: float = 0):
+        self.budget_ms = budget_ms
+        self.ticks = {}
+        self.series = {name: [] for name in Ticks.SERIES}
+        self._tick = None
+        self._agents = {}
+        self._busy = {}
+
+    def count(self, ltip: str, data: dict) -> None:
+        # a plan change ends the plan block of the last counted line
+        if ltip == Parser.PLAN_CHANGED:
+            if self._tick:
+                self._tick['plan_changes'] += 1
+            return
+        if 'time' in data:
+            self._tick = self._count(ltip, data)
+
+    def observe(self, tracer, ltip: str, data: dict) -> None:
+        at = data.get('time')
+        if not at:
+            return
+        if ltip in (Parser.TASK_RECEIVED, Parser.STATUS_CHANGED):
+            self._update_agent(tracer, data.get('task', ''))
+        self._sample('live plan', at, len(tracer.tasks))
+        self._sample('pending actions', at, len(tracer.actions))
+        self._sample('busy agents', at, len(self._busy))
+
+    def _count(self, ltip: str, data: dict) -> dict:
+        no = data.get('tick', 0)
+        tick = self.ticks.get(no)
+        if tick is None:
+            tick = self.ticks[no] = {'first': '', 'last': '', 'lines': 0,
+                                               'replans': 0, 'decomposed': 0, 'plan_changes': 0}
+        if data.get('scope', '').startswith(Ticks.PLANNER_SCOPE):
+            if not tick['first']:
+                tick['first'] = data['time']
+            tick['last'] = data['time']
+            tick['lines'] += 1
+        if ltip in (Parser.APPEND_PLAN, Parser.REPLACE_PLAN):
+            tick['replans'] += 1
+        elif ltip == Parser.DECOMPOSED:
+            tick['decomposed'] += 1
+        return tick
+
+    def _update_agent(self, tracer, task: str) -> None:
+        # busy agents are the distinct agents of pending actions
+        agent = self._agents.pop(task, None)
+        if agent is not None:
+            self._busy[agent] -= 1
+            if not self._busy[agent]:
+                del self._busy[agent]
+        action = tracer.actions.get(task)
+        if action and action.get('agent'):
+            agent = action['agent']
+            self._agents[task] = agent
+            self._busy[agent] = self._busy.get(agent, 0) + 1
+
+    def _sample(self, name: str, at: str, value: int) -> None:
+        series = self.series[name]
+        if series and series[-1][1] == value:
+            return
+        if series and series[-1][0] == at:
+            series[-1] = (at, value)
+        else:
+            series.append((at, value))
+
+    def report(self) -> list[dict]:
+        res = []
+        for no in sorted(self.ticks):
+            tick = self.ticks[no]
+            planning = 0
+            if tick['first']:
+                planning = (Trace.time2ms(tick['last']) - Trace.time2ms(tick['first'])) / 1000
+            res.append({'tick': no, 'start': tick['first'], 'planning_ms': planning, 'lines': tick['lines'],
+                        'replans': tick['replans'], 'decomposed': tick['decomposed'],
+                        'plan_changes': tick['plan_changes']})
+        return res
+
+    def render(self, top: int = 10) -> str:
+        report = self.report()
+        planned = [r for r in report if r['lines']]
+        res = f"{len(report)} ticks, {len(planned)} with planner lines"
+        if planned:
+            total = sum(r['planning_ms'] for r in planned)
+            res += f", planning {total:.0f} ms, mean {total / len(planned):.1f} ms per tick"
+        res += f", {sum(r['replans'] for r in report)} replans\n"
+        if self.budget_ms:
+            over = [r for r in planned if r['planning_ms'] > self.budget_ms]
+            res += f"{len(over)} ticks over the {self.budget_ms:g} ms budget\n"
+        res += f"{'tick':>8} {'start':<24} {'planning ms':>11} {'lines':>7} {'replans':>7} {'decomposed':>10} {'changes':>7}\n"
+        for r in sorted(planned, key=lambda r: -r['planning_ms'])[:top]:
+            res += (f"{r['tick']:>8} {r['start']:<24} {r['planning_ms']:>11.1f} {r['lines']:>7} "
+                    f"{r['replans']:>7} {r['decomposed']:>10} {r['plan_changes']:>7}\n")
+        return res
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'budget_ms': self.budget_ms, 'ticks': self.report()}, f, indent=2)
+        print(f"Tick report saved to {path}")
+
+    def counter_events(self) -> list[dict]:
+        res = []
+        for name, values in self.series.items():
+            for at, value in values:
+                res.append(CT.C(name, Trace.time2ms(at), {name: value}))
+        return res
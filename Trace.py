@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 
-import re
 import datetime
 
+from Symbols import Symbols
+
 class Trace:
     ACTION = 'A'
     TASK = 'T'
@@ -37,7 +38,8 @@ class Trace:
         if 'agentID' in data:
             del data['agentID']
         if 'agentID' in data['args']:
-            del data['args']['agentID']
+            # args dicts are shared between tasks with the same raw args, so copy instead of deleting
+            data['args'] = {k: v for k, v in data['args'].items() if k != 'agentID'}
         if 'start' not in data:
             if 'time' not in data:
                 raise ValueError(f"Start time not found in Trace data: {data}")
@@ -56,10 +58,7 @@ class Trace:
 
     @staticmethod
     def task2type(task: str) -> str:
-        ms = re.search(r'(\w+)\.(\w+)\.([\w\+]+)', task)
-        if ms:
-            return ms.group(1)
-        return task
+        return Symbols.task2type(task)
     @staticmethod
     def data2agent(data: dict) -> str:
         if 'agent' in data:
@@ -73,3 +72,7 @@ class Trace:
     def time2ms(time: str) -> int:
         tstr = time.replace('Z', '+00:00')
         return int(datetime.datetime.fromisoformat(tstr).timestamp() * 1000000)
+    @staticmethod
+    def ms2time(ms: int) -> str:
+        time = datetime.datetime.fromtimestamp(ms / 1000000, tz=datetime.timezone.utc)
+        return time.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
@@ -6,6 +6,10 @@ from CT import CT
 from Plan import Plan
 from Trace import Trace
 from Parser import Parser
+from Sharder import Sharder
+from Encoder import Encoder
+from Lanes import Lanes
+from Selector import Selector
 
 # In general tracing works in several steps:
 # - log -> events -> Trace objects -> Processing/Filtering -> Chrome Trace objects -> JSON file
@@ -21,11 +25,19 @@ from Parser import Parser
 # CT class provides methods to convert Trace objects to Chrome Trace format
 
 class Tracer:
-    def __init__(self, events: list[dict]):
+    selector = Selector.default()
+    compact = False
+    jobs = 1
+    downsampler = None
+
+    def __init__(self, events: list[dict], stats=None, on_plan_changed=None, ticks=None):
         self._tasks = {}
         self._actions = {}
         self._del_tasks = {}
         self._options = {}
+        self._added = {}
+        self._removed = {}
+        self.on_plan_changed = on_plan_changed
         self.parser = Parser('')
         self.session = {}
         self._methods = {
@@ -38,15 +50,25 @@ class Tracer:
             Parser.STATUS_CHANGED:  self._prepare_StatusChanged,
             Parser.START_SESSION:   self._prepare_StartSession,
         }
+        self.stats = stats
+        if stats and stats.enabled:
+            self._instrument(stats)
+        self.ticks = ticks
+        if ticks:
+            self._observe(ticks)
         self._events = events
+        self._selected = None
         self._traces = self.prepare(events)
 
     def prepare(self, events) -> list[Trace]:
-        res = []
+        return list(self.iterate(events))
+
+    def iterate(self, events):
+        # yields traces as soon as they are finished, tasks still open at the end come last
         finish = ''
         for event in events:
             if isinstance(event, Trace):
-                res.append(event)
+                yield event
                 continue
             ltip = event.get('ltip')
             if 'time' in event:
@@ -55,14 +77,13 @@ class Tracer:
             if not data:
                 continue
             if isinstance(data, list):
-                res.extend(data)
+                yield from data
             else:
-                res.append(data)
+                yield data
         self.session['finish'] = finish
         for _, data in self._tasks.items():
             data['finish'] = finish
-            res.append(Trace(data))
-        return res
+            yield Trace(data)
 
     def _prepare_event(self, ltip, data: dict):
         task = data.get('task', '')
@@ -71,6 +92,29 @@ class Tracer:
             return method(task, data)
         return []
 
+    def _instrument(self, stats) -> None:
+        for ltip, method in self._methods.items():
+            self._methods[ltip] = stats.wrap(f'tracer.{ltip}', method)
+        self._prepared = 0
+        self._prepare_event = self._prepare_event_sampled
+
+    def _observe(self, ticks) -> None:
+        prepare = self._prepare_event
+        def observed(ltip, data: dict):
+            res = prepare(ltip, data)
+            ticks.observe(self, ltip, data)
+            return res
+        self._prepare_event = observed
+
+    def _prepare_event_sampled(self, ltip, data: dict):
+        res = Tracer._prepare_event(self, ltip, data)
+        self._prepared += 1
+        if self._prepared % self.stats.sample_every == 0 and 'time' in data:
+            self.stats.sample('tasks', data['time'], len(self._tasks))
+            self.stats.sample('actions', data['time'], len(self._actions))
+            self.stats.sample('del_tasks', data['time'], len(self._del_tasks))
+        return res
+
     def _prepare_Decomposed(self, task: str, data: dict):
         if task in self._tasks:
             self._tasks[task]['reset_time'] = data['time']
@@ -80,7 +124,9 @@ class Tracer:
                 task_data['reset_time'] = data['time']
     def _prepare_NewTask(self, task: str, data: dict):
         if task not in self._tasks:
-            self._tasks[task] = data
+            self._tasks[task] = self.parser.unpack(data)
+            if self.on_plan_changed:
+                self._added[task] = self._tasks[task]
         self._tasks[task].pop('reset_time', None)
     def _prepare_TaskCompleted(self, task: str, data: dict):
         if task not in self._tasks:
@@ -88,8 +134,10 @@ class Tracer:
         start_data = self._tasks[task]
         start_data['finish'] = data['time']
         del self._tasks[task]
+        if self.on_plan_changed:
+            self._journal_removed(task, start_data)
         return Trace(start_data)
-    def _prepare_PlanChanged(self, _: str, __: dict):
+    def _prepare_PlanChanged(self, _: str, data: dict):
         res = []
         for task, task_data in self._tasks.copy().items():
             if 'reset_time' in task_data:
@@ -97,7 +145,17 @@ class Tracer:
                 del self._tasks[task]
                 task_data['finish'] = task_data['reset_time']
                 res.append(Trace(task_data))
+                if self.on_plan_changed:
+                    self._journal_removed(task, task_data)
+        if self.on_plan_changed:
+            self.on_plan_changed(self, data['time'], self._added, self._removed)
+            self._added = {}
+            self._removed = {}
         return res
+    def _journal_removed(self, task: str, task_data: dict):
+        # a task added and removed between two plan changes is not reported
+        if self._added.pop(task, None) is None:
+            self._removed[task] = task_data
     def _prepare_TaskReceived(self, task: str, data: dict):
         self._actions[task] = data
         return []
@@ -123,6 +181,27 @@ class Tracer:
     @property
     def traces(self) -> list[Trace]:
         return self._traces
+    @traces.setter
+    def traces(self, traces: list[Trace]) -> None:
+        self._traces = traces
+        self._selected = None
+
+    # Selected traces of the session, arranged once: every export of the session
+    # is a subset of them, so a slice keeps its lane (tid) in all the files.
+    def selected(self) -> list[Trace]:
+        if self._selected is None:
+            self._selected = Tracer.arrange_traces(Tracer.filter_traces(self._traces))
+        return self._selected
+    def set_selected(self, traces: list[Trace]) -> None:
+        self._selected = traces
+
+    @property
+    def tasks(self) -> dict:
+        return self._tasks
+
+    @property
+    def actions(self) -> dict:
+        return self._actions
 
     def set_option(self, key: str, value) -> None:
         self._options[key] = value
@@ -131,28 +210,57 @@ class Tracer:
         return self._options.get(key, False)
 
     def export(self, filename: str) -> None:
-        Tracer.export_traces(self._traces, f'{filename}.json')
-        Tracer.export_actions(self._traces, f'{filename}-actions.json')
+        trs = self.selected()
+        Tracer.write_traces(trs, f'{filename}.json', self.counter_events())
+        Tracer.write_traces(Tracer.select_actions(trs), f'{filename}-actions.json')
+
+    def counter_events(self) -> list[dict]:
+        counters = self.stats.counter_events() if self.stats and self.stats.enabled else []
+        if self.ticks:
+            counters += self.ticks.counter_events()
+        return counters
 
     @staticmethod
-    def export_actions(traces: list[Trace], output_path: str) -> None:
+    def select_actions(traces: list[Trace]) -> list[Trace]:
         res = []
         for trace in traces:
             if trace.get('optype') == Trace.ACTION:
                 res.append(trace)
-        Tracer.export_traces(res, output_path)
+        return res
 
     @staticmethod
-    def export_traces(traces: list[Trace], output_path: str) -> None:
+    def filter_traces(traces: list[Trace]) -> list[Trace]:
         trs = []
         for trace in traces:
-            type = trace.get('type')
-            if not type in ['SOLVE_MAPF', 'CHECK_SELF_CONTROL_REQS', 'CHECK_ROBOT_BATTERIES', 'INCREMENT_THROUGHPUT']:
+            if Tracer.selector.accepts(trace):
                 trs.append(trace)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(CT.build_file(trs), f, indent=2)
+        return trs
+
+    @staticmethod
+    def arrange_traces(trs: list[Trace]) -> list[Trace]:
+        # the passes over all selected traces of a session before they can be encoded,
+        # they set lanes in the traces, so run them once per session (see selected())
+        if Tracer.downsampler:
+            trs = Tracer.downsampler.downsample(trs)
+        Lanes.assign(trs)
+        return trs
+
+    @staticmethod
+    def write_traces(trs: list[Trace], output_path: str, counters: list[dict] = None, events: list[dict] = None) -> None:
+        # `events` are the CT events of the traces when they are already converted
+        if Tracer.compact and Tracer.jobs > 1:
+            Encoder(Tracer.jobs).write(trs, output_path, counters)
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                if Tracer.compact:
+                    json.dump(CT.build_file(trs, counters, events), f, separators=Encoder.SEPARATORS)
+                else:
+                    json.dump(CT.build_file(trs, counters, events), f, indent=2)
         print(f"Trace exported to {output_path}")
 
+    def export_shards(self, filename: str, sharder: Sharder) -> dict:
+        return sharder.export(self.selected(), filename, self.counter_events())
+
     def has_task(self, task: str) -> bool:
         return task in self._tasks or task in self._del_tasks
     def get_task(self, task: str) -> dict:
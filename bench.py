@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+import sys
+import argparse
+
+from Bench import Bench
+from Generator import Generator
+
+def parse_args():
+    ap = argparse.ArgumentParser(description='Generate synthetic planner logs and benchmark the tracer pipeline')
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help='write a synthetic planner log')
+    gen.add_argument('output', help='log file to write')
+    gen.add_argument('--agents', type=int, default=12)
+    gen.add_argument('--messages', type=int, default=100)
+    gen.add_argument('--tasks-per-plan', type=int, default=4)
+    gen.add_argument('--replan-every', type=int, default=10, help='ticks between REPLACE PLAN blocks')
+    gen.add_argument('--noise', type=float, default=0.05, help='probability of a noise line per tick')
+    gen.add_argument('--seed', type=int, default=0)
+
+    run = sub.add_parser('run', help='time every pipeline stage on a log')
+    run.add_argument('log_file')
+    run.add_argument('--repeat', type=int, default=1, help='repeat and keep the best time of every stage')
+    run.add_argument('--output', help='save results to this JSON file')
+
+    cmp = sub.add_parser('compare', help='compare two saved results')
+    cmp.add_argument('old')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=0.1, help='relative slowdown reported as regression')
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+    if args.command == 'generate':
+        gen = Generator(args.agents, args.messages, args.tasks_per_plan, args.replan_every, args.noise, args.seed)
+        gen.write(args.output)
+    elif args.command == 'run':
+        result = Bench(args.log_file, args.repeat).run()
+        print(Bench.render(result), end='')
+        if args.output:
+            Bench.save(result, args.output)
+    elif args.command == 'compare':
+        table, regressions = Bench.compare(Bench.load(args.old), Bench.load(args.new), args.threshold)
+        print(table, end='')
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
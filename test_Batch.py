@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+from Batch import Batch
+from Generator import Generator
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.logs = os.path.join(self.dir, 'logs')
+        self.output = os.path.join(self.dir, 'out')
+        os.makedirs(self.logs)
+        for no in range(2):
+            Generator(messages=10, seed=no).write(os.path.join(self.logs, f'sim{no}.log'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_batch(self, jobs: int = 1, force: bool = False) -> dict:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            results = Batch(self.output, jobs, force).run([self.logs])
+        # workers are silent, the caller prints the summary
+        self.assertEqual(out.getvalue(), '')
+        return {os.path.basename(r['log']): r for r in results}
+
+    def ledger(self) -> dict:
+        with open(os.path.join(self.output, Batch.LEDGER), 'r', encoding='utf-8') as f:
+            return {os.path.basename(path): ident for path, ident in json.load(f).items()}
+
+    def test_skip(self):
+        results = self.run_batch()
+        self.assertEqual({name: r['status'] for name, r in results.items()}, {'sim0.log': 'ok', 'sim1.log': 'ok'})
+        self.assertTrue(os.path.isfile(os.path.join(self.output, 'sim0.json')))
+        self.assertEqual(sorted(self.ledger()), ['sim0.log', 'sim1.log'])
+        results = self.run_batch()
+        self.assertEqual({r['status'] for r in results.values()}, {'skipped'})
+        # a changed log has another identity
+        with open(os.path.join(self.logs, 'sim1.log'), 'a', encoding='utf-8') as f:
+            f.write('\n')
+        results = self.run_batch()
+        self.assertEqual({name: r['status'] for name, r in results.items()}, {'sim0.log': 'skipped', 'sim1.log': 'ok'})
+        results = self.run_batch(force=True)
+        self.assertEqual({r['status'] for r in results.values()}, {'ok'})
+
+    def test_failures(self):
+        with open(os.path.join(self.logs, 'empty.log'), 'w', encoding='utf-8') as f:
+            f.write('')
+        with open(os.path.join(self.logs, 'broken.log'), 'w', encoding='utf-8') as f:
+            f.write('not a log line\n')
+        for jobs in [1, 2]:
+            results = self.run_batch(jobs, force=True)
+            self.assertEqual({name: r['status'] for name, r in results.items()},
+                             {'broken.log': 'failed', 'empty.log': 'failed', 'sim0.log': 'ok', 'sim1.log': 'ok'})
+            self.assertIn('No events found', results['empty.log']['error'])
+            self.assertEqual(sorted(self.ledger()), ['sim0.log', 'sim1.log'])
+        # failed logs are retried
+        results = self.run_batch()
+        self.assertEqual(results['empty.log']['status'], 'failed')
+        self.assertEqual(results['sim0.log']['status'], 'skipped')
+        render = Batch.render(list(results.values()))
+        self.assertIn('2 failed, 2 skipped', render)
+
+if __name__ == '__main__':
+    unittest.main()
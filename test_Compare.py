@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import unittest
+
+from Compare import Compare, Summary
+from Generator import Generator
+
+class TestCompare(unittest.TestCase):
+    def summary(self, durations: list) -> Summary:
+        rnd = random.Random(0)
+        res = Summary()
+        for dur in durations:
+            res.add(dur, rnd)
+        return res
+
+    def session(self, durations: list, duration: float = 100) -> dict:
+        return {'log': 'x.log', 'duration': duration, 'groups': {('T', 'SOLVE_MAPF', ''): self.summary(durations)}}
+
+    def test_quantile(self):
+        summary = self.summary(range(1, 100001))
+        self.assertAlmostEqual(summary.quantile(0.5), 50000, delta=1000)
+        self.assertAlmostEqual(summary.quantile(0.99), 99000, delta=2000)
+        self.assertEqual(len(summary.sample), Summary.RESERVOIR)
+
+    def test_mann_whitney(self):
+        rnd = random.Random(3)
+        xs = [rnd.gauss(100, 10) for _ in range(500)]
+        ys = [rnd.gauss(100, 10) for _ in range(500)]
+        zs = [rnd.gauss(110, 10) for _ in range(500)]
+        self.assertGreater(Compare.mann_whitney(xs, ys), 0.01)
+        self.assertLess(Compare.mann_whitney(xs, zs), 1e-6)
+        self.assertEqual(Compare.mann_whitney([5] * 30, [5] * 30), 1.0)
+
+    def test_shift(self):
+        rnd = random.Random(2)
+        old = self.session([int(rnd.expovariate(1 / 1000)) + 1 for _ in range(2000)])
+        new = self.session([int(rnd.expovariate(1 / 1500)) + 1 for _ in range(2000)])
+        same = self.session([int(rnd.expovariate(1 / 1000)) + 1 for _ in range(2000)])
+        self.assertEqual(Compare().compare(old, same)['rows'][0]['shift'], '')
+        self.assertEqual(Compare().compare(old, new)['rows'][0]['shift'], 'p50+ p99+')
+        self.assertEqual(Compare().compare(old, self.session(range(1, 1001)))['rows'][0]['shift'].split()[-1], 'rate-')
+
+    def test_rate(self):
+        # the U test needs min_count traces on both sides, the rate test in total
+        old = self.session([1000] * 1000, duration=10000)
+        row = Compare().compare(old, self.session([1000], duration=10000))['rows'][0]
+        self.assertIsNone(row['p'])
+        self.assertEqual(row['shift'], 'rate-')
+        # rates rounding to 0
+        row = Compare().compare(self.session([1000] * 40, duration=100000), old)['rows'][0]
+        self.assertEqual(row['old_rate'], 0)
+        self.assertEqual(row['shift'], 'rate+')
+        row = Compare().compare(self.session([1000] * 5), self.session([1000] * 6))['rows'][0]
+        self.assertEqual(row['shift'], '')
+
+    def test_missing(self):
+        old = self.session([1000] * 3)
+        new = self.session([1000] * 3)
+        new['groups'][('A', 'MOVE', 'Failed')] = self.summary([500])
+        rows = Compare().compare(old, new)['rows']
+        self.assertEqual([row['shift'] for row in rows], ['new', ''])
+        rows = Compare().compare(new, old)['rows']
+        self.assertEqual([row['shift'] for row in rows], ['gone', ''])
+
+    def test_same_log(self):
+        path = Generator.temp_log(messages=40)
+        self.addCleanup(os.remove, path)
+        result = Compare().run(path, path, jobs=1)
+        self.assertTrue(result['rows'])
+        self.assertFalse(any(row['shift'] for row in result['rows']))
+
+if __name__ == '__main__':
+    unittest.main()
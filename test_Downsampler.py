@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import tempfile
+import contextlib
+import unittest
+
+from Parser import Parser
+from Tracer import Tracer
+from Selector import Selector
+from Generator import Generator
+from Downsampler import Downsampler
+
+class TestDownsampler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = Generator.temp_log(messages=40)
+        cls.traces = Tracer(Parser(cls.path).events).traces
+        cls.periodic = [t for t in cls.traces if t.get('type') in Selector.PERIODIC]
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def aggregated(self, traces: list) -> list:
+        return [t for t in traces if t.get('type') in Selector.PERIODIC]
+
+    def test_bucket(self):
+        res = Downsampler(bucket_ms=1000).downsample(self.traces)
+        aggregated = self.aggregated(res)
+        self.assertEqual(len(res) - len(aggregated), len(self.traces) - len(self.periodic))
+        self.assertLess(len(aggregated), len(self.periodic))
+        self.assertEqual(sum(t.get('args')['count'] for t in aggregated), len(self.periodic))
+        for trace in aggregated:
+            self.assertEqual(trace.get('args')['bucket_ms'], 1000)
+            self.assertLessEqual(trace.get('args')['max_ms'], trace.get('args')['total_ms'])
+            self.assertLessEqual(trace.get_ms('finish') - trace.get_ms('start'), 1000000)
+        # one slice per type, optype, agent and bucket
+        keys = {(t.get('type'), t.get('optype'), t.get('agent'), t.get_ms('start') // 1000000) for t in self.periodic}
+        self.assertEqual(len(aggregated), len(keys))
+        self.assertEqual(len({t.task for t in aggregated}), len(aggregated))
+
+    def test_budget(self):
+        budget = len(self.periodic) // 10
+        aggregated = self.aggregated(Downsampler(budget=budget).downsample(self.traces))
+        self.assertLessEqual(len(aggregated), budget)
+        self.assertEqual(sum(t.get('args')['count'] for t in aggregated), len(self.periodic))
+
+    def test_choose_bucket(self):
+        # starts at 400 and 599 ms share a 200 ms bucket but not a 500 ms one
+        periodic = [(('SOLVE_MAPF', 'T', ''), start * 1000, start * 1000, None) for start in [400, 599]]
+        self.assertEqual(Downsampler(budget=1).choose_bucket(periodic), 200)
+        self.assertEqual(Downsampler(budget=2).choose_bucket(periodic), 1)
+
+    def test_session(self):
+        # exports of a session share the traces downsampled once
+        tracer = Tracer(Parser(self.path).events)
+        downsampler = Tracer.downsampler
+        selector = Tracer.selector
+        Tracer.downsampler = Downsampler(bucket_ms=1000)
+        Tracer.selector = Selector()
+        out = io.StringIO()
+        try:
+            with tempfile.TemporaryDirectory() as dir, contextlib.redirect_stdout(out):
+                selected = tracer.selected()
+                tracer.export(os.path.join(dir, 'sim'))
+                tracer.export(os.path.join(dir, 'sim-short'))
+        finally:
+            Tracer.downsampler = downsampler
+            Tracer.selector = selector
+        self.assertIs(tracer.selected(), selected)
+        self.assertEqual(out.getvalue().count('Downsampled'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
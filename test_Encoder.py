@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import unittest
+
+from CT import CT
+from Parser import Parser
+from Tracer import Tracer
+from Encoder import Encoder
+from Generator import Generator
+
+class TestEncoder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = Generator.temp_log(messages=40)
+        cls.traces = Tracer(Parser(cls.path).events).traces
+        cls.counters = [CT.C('plan', 1000, {'size': 3}), CT.C('plan', 2000, {'size': 0})]
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def serial(self, traces: list, counters: list = None) -> bytes:
+        return json.dumps(CT.build_file(traces, counters), separators=(',', ':')).encode()
+
+    def test_byte_identical(self):
+        expected = self.serial(self.traces, self.counters)
+        for jobs, chunk in [(1, 5000), (1, 7), (3, 7), (2, 1)]:
+            res = b''.join(Encoder(jobs, chunk).encode(self.traces, self.counters))
+            self.assertEqual(res, expected, f'jobs={jobs} chunk={chunk}')
+
+    def test_empty(self):
+        self.assertEqual(b''.join(Encoder(2).encode([])), self.serial([]))
+        self.assertEqual(b''.join(Encoder(2).encode([], self.counters)), self.serial([], self.counters))
+
+if __name__ == '__main__':
+    unittest.main()
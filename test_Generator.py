@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+
+from Parser import Parser
+from Tracer import Tracer
+from Generator import Generator
+
+class TestGenerator(unittest.TestCase):
+    def log(self, **kwargs) -> str:
+        path = Generator.temp_log(**kwargs)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_all_formats(self):
+        parser = Parser(self.log(messages=20, noise=0))
+        self.assertEqual(parser.unparsed, 0)
+        ltips = set(event['ltip'] for event in parser.events)
+        for ltip in [Parser.APPEND_PLAN, Parser.REPLACE_PLAN, Parser.DECOMPOSED, Parser.NEW_TASK,
+                     Parser.PLAN_CHANGED, Parser.PERFORM_TASK, Parser.STATUS_CHANGED,
+                     Parser.TASK_RECEIVED, Parser.TASK_COMPLETED, Parser.START_SESSION]:
+            self.assertIn(ltip, ltips)
+
+    def test_noise(self):
+        parser = Parser(self.log(messages=20, noise=1))
+        self.assertGreater(parser.unparsed, 0)
+
+    def test_traces(self):
+        tracer = Tracer(Parser(self.log(messages=20)).events)
+        self.assertEqual(tracer.session['site'], '51.24.4-N')
+        types = set(trace.get('type') for trace in tracer.traces)
+        self.assertIn('SOLVE_MAPF', types)
+        self.assertIn('CARRY_BIN', types)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import random
+import tempfile
+import unittest
+
+from CT import CT
+from Lanes import Lanes
+from Parser import Parser
+from Tracer import Tracer
+from Filter import FindChildren
+from Pipeline import Pipeline
+from Generator import Generator
+
+class TestLanes(unittest.TestCase):
+    def test_assign(self):
+        traces = [
+            Generator.trace(1, 0, 100),
+            Generator.trace(2, 10, 20),
+            Generator.trace(3, 20, 30),
+            Generator.trace(4, 25, 40),
+            Generator.trace(5, 100, 110),
+            Generator.trace(6, 10, 20, agent='RS2'),
+        ]
+        self.assertEqual(Lanes.assign(traces), 3)
+        self.assertEqual([t.get('lane') for t in traces], [0, 1, 1, 2, 0, 0])
+        self.assertEqual(CT.trace2tid(traces[3]), 2)
+        self.assertNotIn('lane', CT.trace2args(traces[3]))
+
+    def test_stable(self):
+        rnd = random.Random(0)
+        traces = []
+        for no in range(200):
+            start = rnd.randrange(1000)
+            traces.append(Generator.trace(no, start, start + rnd.randrange(1, 100), agent=f'RS{no % 3}'))
+        Lanes.assign(traces)
+        lanes = {t.task: t.get('lane') for t in traces}
+        rnd.shuffle(traces)
+        Lanes.assign(traces)
+        self.assertEqual({t.task: t.get('lane') for t in traces}, lanes)
+
+    def tids(self, path: str) -> dict:
+        with open(path, 'r', encoding='utf-8') as f:
+            events = json.load(f)['traceEvents']
+        return {(e['name'], e.get('pid', 0), e['ts']): e.get('tid', 0) for e in events if e['ph'] == 'X'}
+
+    def test_exports(self):
+        # a slice has the same track in the main, the children and the actions export
+        path = Generator.temp_log(messages=40)
+        self.addCleanup(os.remove, path)
+        with tempfile.TemporaryDirectory() as dir:
+            tracer = Tracer(Parser(path, selector=Tracer.selector).events)
+            Pipeline(path, selector=Tracer.selector).run(os.path.join(dir, 'pipe'))
+            tracer.export(os.path.join(dir, 'sim'))
+            finder = FindChildren(tracer)
+            finder.start(next(t.task for t in tracer.selected() if t.task.startswith('DISP_MSG.')))
+            finder.export(os.path.join(dir, 'children'))
+            children = self.tids(os.path.join(dir, 'children.json'))
+            self.assertGreater(len(children), 1)
+            self.assertEqual({key: self.tids(os.path.join(dir, 'sim.json'))[key] for key in children}, children)
+            for name in ['sim', 'pipe']:
+                main = self.tids(os.path.join(dir, f'{name}.json'))
+                actions = self.tids(os.path.join(dir, f'{name}-actions.json'))
+                self.assertTrue(actions)
+                self.assertTrue(any(actions.values()))
+                self.assertEqual({key: main[key] for key in actions}, actions)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 
+import os
+import json
+import tempfile
 import unittest
 
 from Parser import Parser
+from Stats import Stats
+from Trace import Trace
+from Tracer import Tracer
+from Generator import Generator
 
 class TestParser(unittest.TestCase):
     args_exs = {
@@ -56,10 +63,64 @@ class TestParser(unittest.TestCase):
         for input, pres in TestParser.pres_exs.items():
             self.assertEqual(trace.render_pres(pres), input)
 
+    def test_unpack(self):
+        trace = Parser('')
+        pres = '`IF_VALID(task=CARRY_BIN.3p.4n)`, `CAN_LEASE_NODE(tenant=RS8, node=51.24.4-WS-4-N-10000001530-1f0)`'
+        event = trace.parse_data({
+            'scope': '/planner',
+            'time': '2025-04-22T15:52:44.358Z',
+            'message': f'1. [O] LEASE.3p.4o(tenant=RS8, node=51.24.4-WS-4-N-10000001530-1f0) Pre: {pres}',
+        })
+        self.assertEqual(event['args'], 'tenant=RS8, node=51.24.4-WS-4-N-10000001530-1f0')
+        self.assertEqual(event['pres'], pres)
+        trace.unpack(event)
+        self.assertEqual(event['args'], TestParser.args_exs['tenant=RS8, node=51.24.4-WS-4-N-10000001530-1f0'])
+        self.assertEqual(event['pres'], TestParser.pres_exs[pres])
+        self.assertIs(trace.parse_pres(pres), event['pres'])
+
     def test_example(self):
         trace = Parser('example.txt')
         self.assertEqual(trace.unparsed, 0)
         # trace.dump()
 
+    def test_stats(self):
+        stats = Stats()
+        trace = Parser('example.txt', stats=stats)
+        self.assertEqual(trace.events, Parser('example.txt').events)
+        self.assertEqual(stats.stages['parser.decode'][1], 64)
+        self.assertEqual(stats.stages['parser.NewTask._parse_NewTask'][2], 28)
+        self.assertGreater(stats.regex_attempts(), 1)
+
+    def test_merge(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, 'all.log')
+            Generator(messages=40).write(path)
+            # unique times, so the merged order is the order of the log written as one file
+            lines = []
+            with open(path, 'r', encoding='utf-8') as f:
+                for no, line in enumerate(f):
+                    data = json.loads(line)
+                    if 'time' in data:
+                        data['time'] = Trace.ms2time(1745337164000000 + no * 1000)
+                    lines.append(json.dumps(data) + '\n')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            files = {}
+            for line in lines:
+                scope = json.loads(line).get('scope', '')
+                name = os.path.join(dir, scope.split('/')[1] or 'main') + '.log' if scope else path + '.noise'
+                files.setdefault(name, []).append(line)
+            for name, part in files.items():
+                with open(name, 'w', encoding='utf-8') as f:
+                    f.writelines(part)
+            merged = Parser(sorted(files)).events
+            single = Parser(path).events
+
+        times = [e['time'] for e in merged if e['ltip'] != Parser.PLAN_CHANGED]
+        self.assertEqual(times, sorted(times))
+        key = lambda events: sorted((t.task, t.get('start'), t.get('finish'), t.data.get('status', ''))
+                                    for t in Tracer(events).traces)
+        self.assertEqual(key(merged), key(single))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from Parser import Parser
+from Tracer import Tracer
+from Pipeline import Pipeline
+from Generator import Generator
+
+class TestPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = Generator.temp_log(messages=40)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read(self, name: str) -> bytes:
+        with open(os.path.join(self.dir, name), 'rb') as f:
+            return f.read()
+
+    def assertSameExport(self, path, jobs: int = 1):
+        tracer = Tracer(Parser(path, selector=Tracer.selector).events)
+        tracer.export(os.path.join(self.dir, 'steps'))
+        res = Pipeline(path, selector=Tracer.selector, jobs=jobs, batch=100, depth=2).run(os.path.join(self.dir, 'pipeline'))
+        self.assertEqual(len(res.traces), len(tracer.traces))
+        self.assertEqual(self.read('pipeline.json'), self.read('steps.json'))
+        self.assertEqual(self.read('pipeline-actions.json'), self.read('steps-actions.json'))
+
+    def test_same_export(self):
+        self.assertSameExport(self.path)
+
+    def test_pooled(self):
+        self.assertSameExport(self.path, jobs=2)
+
+    def test_merged(self):
+        planner = os.path.join(self.dir, 'planner.log')
+        agents = os.path.join(self.dir, 'agents.log')
+        with open(self.path) as f, open(planner, 'w') as p, open(agents, 'w') as a:
+            for line in f:
+                (p if '"/planner"' in line or '"/leader' in line else a).write(line)
+        self.assertSameExport([planner, agents])
+
+    def test_error(self):
+        path = os.path.join(self.dir, 'sim.log')
+        shutil.copy(self.path, path)
+        with open(path, 'a') as f:
+            f.write(json.dumps({'time': '2025-04-22T23:00:00.000Z', 'scope': '/agent', 'tick': 0,
+                                'message': 'Task SELF.R.zz status changed to Completed: done'}) + '\n')
+        with self.assertRaises(ValueError):
+            Pipeline(path, batch=100, depth=2).run(os.path.join(self.dir, 'pipeline'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 
+import io
 import unittest
 
-from Plan import Plan
+from Plan import Plan, PlanDeltas
 from Parser import Parser
 from Tracer import Tracer
 
@@ -40,5 +41,60 @@ class TestPlan(unittest.TestCase):
 '''
         self.assertEqual(plan, expected_output)
 
+    def test_deep_chain(self):
+        depth = 5000
+        tasks = {}
+        for no in range(depth):
+            tasks[f'TASK{no}'] = {'task': f'TASK{no}', 'optype': 'T', 'parent': f'TASK{no - 1}' if no else ''}
+        self.tracer.tasks.update(tasks)
+        plan = Plan(self.tracer)
+        plan.add_task(tasks[f'TASK{depth - 1}'])
+        lines = plan.render().splitlines()
+        self.assertEqual(lines[0], f'{depth} tasks')
+        self.assertEqual(lines[-1], ' ' * 2 * (depth - 1) + f'[T] TASK{depth - 1}')
+
+    def test_missing_parent(self):
+        plan = Plan(self.tracer)
+        with self.assertRaises(ValueError):
+            plan.add_task({'task': 'TASK2', 'optype': 'T', 'parent': 'TASK1'})
+
+    def test_render_delta(self):
+        plan = Plan(self.tracer)
+        added = {
+            'TASK4': {'task': 'TASK4', 'optype': 'T', 'parent': 'TASK2', 'args': {'msgID': '1'}},
+            'TASK5': {'task': 'TASK5', 'optype': 'O'},
+        }
+        removed = {
+            'TASK3': {'task': 'TASK3', 'optype': 'O'},
+            'TASK5': {'task': 'TASK5', 'optype': 'O'},
+        }
+        expected_output = '''- [O] TASK3
++ [T] TASK4(msgID=1) < TASK2
+~ [O] TASK5
+'''
+        self.assertEqual(plan.render_delta(added, removed), expected_output)
+
+    def test_plan_deltas(self):
+        events = [
+            {'ltip': Parser.NEW_TASK, 'time': '2025-01-01T00:00:00.000Z', 'task': 'TASK1', 'optype': 'T', 'args': None, 'pres': None},
+            {'ltip': Parser.NEW_TASK, 'time': '2025-01-01T00:00:00.000Z', 'task': 'TASK2', 'optype': 'T', 'args': None, 'pres': None},
+            {'ltip': Parser.PLAN_CHANGED, 'time': '2025-01-01T00:00:00.000Z'},
+            {'ltip': Parser.TASK_COMPLETED, 'time': '2025-01-01T00:00:01.000Z', 'task': 'TASK1'},
+            {'ltip': Parser.NEW_TASK, 'time': '2025-01-01T00:00:01.000Z', 'task': 'TASK3', 'optype': 'O', 'parent': 'TASK2', 'args': None, 'pres': None},
+            {'ltip': Parser.NEW_TASK, 'time': '2025-01-01T00:00:01.000Z', 'task': 'TASK4', 'optype': 'O', 'args': None, 'pres': None},
+            {'ltip': Parser.TASK_COMPLETED, 'time': '2025-01-01T00:00:01.000Z', 'task': 'TASK4'},
+            {'ltip': Parser.PLAN_CHANGED, 'time': '2025-01-01T00:00:01.000Z'},
+        ]
+        f = io.StringIO()
+        Tracer(events, on_plan_changed=PlanDeltas(f))
+        expected_output = '''Plan changed No. 1 at 2025-01-01T00:00:00.000Z: +2 -0 ~0, 2 tasks
++ [T] TASK1
++ [T] TASK2
+Plan changed No. 2 at 2025-01-01T00:00:01.000Z: +1 -1 ~0, 2 tasks
+- [T] TASK1
++ [O] TASK3 < TASK2
+'''
+        self.assertEqual(f.getvalue(), expected_output)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+
+from Parser import Parser
+from Tracer import Tracer
+from Selector import Selector
+from Generator import Generator
+
+class TestSelector(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = Generator.temp_log(messages=30)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def exported(self, selector: Selector, pushdown: bool) -> list:
+        Tracer.selector = selector
+        tracer = Tracer(Parser(self.path, selector=selector if pushdown else None).events)
+        tracer.render_current_plan()
+        return sorted((t.task, t.get('start'), t.get('finish'), t.get('parent')) for t in Tracer.filter_traces(tracer.traces))
+
+    def tearDown(self):
+        Tracer.selector = Selector.default()
+
+    def test_pushdown_default(self):
+        self.assertEqual(self.exported(Selector.default(), True), self.exported(Selector.default(), False))
+
+    def test_pushdown_rules(self):
+        selector = Selector(include={'type': ['DISP_MSG', 'WRAP', 'CARRY_BIN', 'MARK_GROUP_ACTIVE']}, exclude={'optype': ['O', 'A']})
+        traces = self.exported(selector, True)
+        self.assertTrue(traces)
+        self.assertEqual(traces, self.exported(selector, False))
+        self.assertFalse([t for t in traces if t[0].startswith('CARRY_BIN')])
+
+    def test_rejects_task(self):
+        selector = Selector.default()
+        self.assertTrue(selector.rejects_task('SOLVE_MAPF.R.5', 'T', '/leader/squad'))
+        self.assertFalse(selector.rejects_task('DISP_MSG.3p.5', 'T', '/leader/squad'))
+        selector.add_rule('include', 'optype=A')
+        self.assertFalse(selector.rejects_task('CARRY_BIN.3p.5', 'O', '/planner'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import asyncio
+import unittest
+
+from CT import CT
+from Trace import Trace
+from Parser import Parser
+from Tracer import Tracer
+from Server import Server
+from Selector import Selector
+from Filter import FindChildren
+from Generator import Generator
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = Generator.temp_log(messages=40)
+        cls.tracer = Tracer(Parser(cls.path, selector=Tracer.selector).events)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    async def asyncSetUp(self):
+        self.server = Server(self.tracer)
+        self.listener = await asyncio.start_server(self.server.handle, '127.0.0.1', 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.listener.close()
+        await self.listener.wait_closed()
+
+    async def get(self, query: str) -> tuple:
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(f'GET {query} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b''):
+            key, value = line.decode().split(':', 1)
+            headers[key.lower()] = value.strip()
+        chunks = []
+        if headers.get('transfer-encoding') == 'chunked':
+            while size := int((await reader.readline()).strip(), 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            await reader.readline()
+        else:
+            chunks.append(await reader.readexactly(int(headers['content-length'])))
+        writer.close()
+        await writer.wait_closed()
+        return status, chunks, json.loads(b''.join(chunks))
+
+    def expected(self, traces: list[Trace]) -> list[dict]:
+        return sorted((CT.X(t) for t in traces), key=lambda e: (e['ts'], e['name']))
+
+    def events(self, data: dict) -> list[dict]:
+        return sorted(data['traceEvents'], key=lambda e: (e['ts'], e['name']))
+
+    async def test_window(self):
+        traces = self.server.traces
+        start = traces[len(traces) // 2].get_ms('start')
+        finish = start + 1000000
+        status, _, data = await self.get(f'/window?start={start}&finish={finish}')
+        self.assertEqual(status, 200)
+        expected = [t for t in traces if t.get_ms('start') <= finish and t.get_ms('finish') >= start]
+        self.assertTrue(expected)
+        self.assertEqual(self.events(data), self.expected(expected))
+        self.assertEqual(data['displayTimeUnit'], 'ms')
+
+    async def test_chunks(self):
+        # one chunk per Server.CHUNK events between the opening and the closing chunk
+        start = Trace.ms2time(self.server.starts[0])
+        finish = Trace.ms2time(max(self.server.finishes))
+        chunk = Server.CHUNK
+        Server.CHUNK = 100
+        try:
+            status, chunks, data = await self.get(f'/window?start={start}&finish={finish}')
+        finally:
+            Server.CHUNK = chunk
+        self.assertEqual(status, 200)
+        self.assertEqual(self.events(data), self.expected(self.server.traces))
+        self.assertGreater(len(self.server.traces), 200)
+        self.assertEqual(len(chunks), 2 + -(-len(self.server.traces) // 100))
+
+    async def test_agent_and_type(self):
+        trace = next(t for t in self.server.traces if t.get('optype') == Trace.ACTION and t.get('agent'))
+        agent, type = trace.get('agent'), trace.get('type')
+        _, _, data = await self.get(f'/agent?agent={agent}')
+        self.assertEqual(self.events(data), self.expected([t for t in self.server.traces if t.get('agent') == agent]))
+        _, _, data = await self.get(f'/type?type={type}')
+        self.assertEqual(self.events(data), self.expected([t for t in self.server.traces if t.get('type') == type]))
+
+    async def test_subtree(self):
+        task = next(t for t in self.server.traces if t.task.startswith('DISP_MSG.')).task
+        finder = FindChildren(self.tracer)
+        finder.start(task)
+        self.assertGreater(len(finder.tasks), 1)
+        _, _, data = await self.get(f'/subtree?task={task}')
+        self.assertEqual(self.events(data), self.expected([t for t in self.server.traces if t.task in finder.tasks]))
+
+    async def test_plan(self):
+        at = self.server.starts[len(self.server.starts) // 2]
+        _, _, data = await self.get(f'/plan?at={at}')
+        expected = [t for t in self.server.traces if t.get('optype') != Trace.ACTION
+                    and t.get_ms('start') <= at < t.get_ms('finish')]
+        self.assertTrue(expected)
+        self.assertEqual(self.events(data), self.expected(expected))
+
+    async def test_periodic(self):
+        # periodic types are served when the selector keeps them
+        self.assertFalse(self.server.by_type.get('SOLVE_MAPF'))
+        selector = Tracer.selector
+        Tracer.selector = Selector()
+        try:
+            tracer = Tracer(Parser(self.path, selector=Tracer.selector).events)
+            self.server = Server(tracer)
+        finally:
+            Tracer.selector = selector
+        listener = self.listener
+        self.listener = await asyncio.start_server(self.server.handle, '127.0.0.1', 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+        listener.close()
+        await listener.wait_closed()
+        _, _, data = await self.get('/type?type=SOLVE_MAPF')
+        self.assertTrue(data['traceEvents'])
+        self.assertEqual({e['cat'] for e in data['traceEvents']}, {'SOLVE_MAPF'})
+
+    async def test_errors(self):
+        status, _, data = await self.get('/window?start=1')
+        self.assertEqual(status, 400)
+        self.assertIn('error', data)
+        status, _, data = await self.get('/unknown')
+        self.assertEqual(status, 404)
+        self.assertEqual(data['queries'], ['/window', '/subtree', '/agent', '/type', '/plan'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from CT import CT
+from Trace import Trace
+from Parser import Parser
+from Tracer import Tracer
+from Sharder import Sharder
+from Generator import Generator
+
+class TestSharder(unittest.TestCase):
+    BASE = int(Generator.START.timestamp() * 1000000)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def load(self, name: str) -> dict:
+        with open(os.path.join(self.dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_boundaries(self):
+        traces = [Generator.trace(no, no * 10, no * 10 + 5) for no in range(10)]
+        manifest = Sharder(max_events=4).export(traces, os.path.join(self.dir, 'sim'))
+        shards = manifest['shards']
+        self.assertEqual([s['events'] for s in shards], [4, 4, 2])
+        self.assertEqual([s['ts'] for s in shards], [TestSharder.BASE, TestSharder.BASE + 40000, TestSharder.BASE + 80000])
+        for shard in shards:
+            events = self.load(shard['file'])['traceEvents']
+            self.assertTrue(all(shard['ts'] <= e['ts'] and e['ts'] + e['dur'] <= shard['ts'] + shard['dur'] for e in events))
+            self.assertFalse(any('clipped' in e['args'] for e in events))
+
+    def test_clipping(self):
+        # the long slice is clipped into every shard it overlaps, with its time covered once
+        traces = [Generator.trace(0, 0, 95)] + [Generator.trace(no, no * 10, no * 10 + 5) for no in range(1, 10)]
+        manifest = Sharder(max_events=4).export(traces, os.path.join(self.dir, 'sim'))
+        pieces = []
+        for shard in manifest['shards']:
+            events = self.load(shard['file'])['traceEvents']
+            self.assertEqual(len(events), shard['events'])
+            long = [e for e in events if e['args']['msgID'] == '0']
+            self.assertEqual(len(long), 1)
+            self.assertTrue(long[0]['args']['clipped'])
+            self.assertEqual(long[0]['ts'], max(shard['ts'], TestSharder.BASE))
+            pieces.append(long[0]['dur'])
+        self.assertEqual(len(pieces), 3)
+        self.assertEqual(sum(pieces), 95000)
+
+    def test_counters(self):
+        # counter samples go to the shard of their time, the last value before a shard starts it
+        traces = [Generator.trace(no, no * 10, no * 10 + 5) for no in range(10)]
+        counters = [CT.C('live plan', TestSharder.BASE + ms * 1000, {'live plan': ms}) for ms in [0, 15, 20, 85]]
+        manifest = Sharder(max_events=5).export(traces, os.path.join(self.dir, 'sim'), counters)
+        values = []
+        for shard in manifest['shards']:
+            events = self.load(shard['file'])['traceEvents']
+            self.assertEqual(len(events), shard['events'])
+            samples = [e for e in events if e['ph'] == 'C']
+            self.assertTrue(all(shard['ts'] <= e['ts'] < shard['ts'] + shard['dur'] for e in samples))
+            self.assertEqual(samples[0]['ts'], shard['ts'])
+            values.append([e['args']['live plan'] for e in samples])
+        self.assertEqual(values, [[0, 15], [20], [20, 85]])
+
+    def test_manifest(self):
+        traces = [Generator.trace(no, no * 10, no * 10 + 5) for no in range(10)]
+        Sharder(max_events=3).export(traces, os.path.join(self.dir, 'sim'))
+        manifest = self.load('sim-manifest.json')
+        self.assertEqual([s['file'] for s in manifest['shards']], [f'sim-{no:04d}.json' for no in range(4)])
+        self.assertEqual(sum(s['events'] for s in manifest['shards']), 10)
+        for shard in manifest['shards']:
+            self.assertEqual(shard['bytes'], os.path.getsize(os.path.join(self.dir, shard['file'])))
+            self.assertEqual(Trace.time2ms(shard['start']), shard['ts'])
+            self.assertAlmostEqual(Trace.time2ms(shard['finish']), shard['ts'] + shard['dur'], delta=1000)
+
+    def test_size(self):
+        # shards written indented or compact stay within the size, and are what json.dump writes
+        path = Generator.temp_log(messages=40)
+        self.addCleanup(os.remove, path)
+        traces = Tracer(Parser(path).events).selected()
+        for compact, max_bytes in [(False, 60000), (True, 30000)]:
+            manifest = Sharder(max_bytes=max_bytes, compact=compact).export(traces, os.path.join(self.dir, f'sim{compact}'))
+            self.assertGreater(len(manifest['shards']), 3)
+            for no, shard in enumerate(manifest['shards']):
+                with open(os.path.join(self.dir, shard['file']), 'r', encoding='utf-8') as f:
+                    text = f.read()
+                self.assertLessEqual(len(text), max_bytes)
+                if no < len(manifest['shards']) - 1:
+                    self.assertGreater(len(text), max_bytes / 2)
+                data = json.loads(text)
+                if compact:
+                    self.assertEqual(text, json.dumps(data, separators=(',', ':')))
+                else:
+                    self.assertEqual(text, json.dumps(data, indent=2))
+
+if __name__ == '__main__':
+    unittest.main()
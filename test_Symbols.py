@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import unittest
+
+from Parser import Parser
+from Symbols import Symbols
+from Generator import Generator
+
+class TestSymbols(unittest.TestCase):
+    def setUp(self):
+        Symbols.clear()
+
+    def test_task2type(self):
+        tasks = ['CARRY_BIN.3p.1d', 'CARRY_BIN.3p.2x', 'A:SELF.R.E', 'DISP_MSG.3p.Gg',
+                 'x.y', 'PLAIN', 'a.b.-', 'a.b.c', 'a.b.+1', 'A:a.b.c.d']
+        for task in tasks + tasks:
+            ms = re.search(r'(\w+)\.(\w+)\.([\w\+]+)', task)
+            self.assertEqual(Symbols.task2type(task), ms.group(1) if ms else task, task)
+        self.assertIs(Symbols.task2type('CARRY_BIN.3p.1d'), Symbols.task2type('CARRY_BIN.3p.9z'))
+
+    def test_session(self):
+        # the type cache grows with distinct types, not with tasks; plan lines share task ids
+        sizes = []
+        for messages in [20, 200]:
+            path = Generator.temp_log(messages=messages)
+            self.addCleanup(os.remove, path)
+            Symbols.clear()
+            parser = Parser(path)
+            tasks = {}
+            ids = set()
+            for event in parser.events:
+                if event['ltip'] == Parser.NEW_TASK:
+                    ids.update(v for k, v in parser.unpack(event)['args'].items() if k == 'msgID')
+                    Symbols.task2type(event['task'])
+                    self.assertIs(tasks.setdefault(event['task'], event['task']), event['task'])
+                    self.assertIs(tasks.setdefault(event['parent'], event['parent']), event['parent'])
+            sizes.append(len(Symbols._prefixes))
+        self.assertLess(sizes[1], sizes[0] * 2)
+        self.assertTrue(ids)
+        self.assertFalse(ids & set(Symbols._strings))
+        Symbols.clear()
+        self.assertEqual(Symbols.size(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import subprocess
+import tempfile
+import unittest
+
+from Ticks import Ticks
+from Parser import Parser
+from Tracer import Tracer
+from Generator import Generator
+
+class TestTicks(unittest.TestCase):
+    def test_events(self):
+        # every planner line counts, recognized or not
+        lines = [
+            {'time': '2025-01-01T00:00:00.000Z', 'scope': '/planner', 'tick': 1, 'message': 'REPLACE PLAN'},
+            {'time': '2025-01-01T00:00:00.004Z', 'scope': '/planner', 'tick': 1,
+             'message': '0. [O] SELF.R.1(agentID=RS1) Pre: `STATE_READY`'},
+            {'time': '2025-01-01T00:00:00.009Z', 'scope': '/planner', 'tick': 1, 'message': 'Plan is valid'},
+            {'time': '2025-01-01T00:00:00.500Z', 'scope': '/agent', 'tick': 2, 'agentId': 'RS1',
+             'message': 'New task SELF.R.1 received by agent'},
+            {'time': '2025-01-01T00:00:01.000Z', 'scope': '/agent', 'tick': 3, 'agentId': 'RS1',
+             'message': 'Task SELF.R.1 status changed to Completed'},
+        ]
+        ticks = Ticks()
+        parser = Parser('', ticks=ticks)
+        for data in lines:
+            parser.add_data(data)
+        self.assertEqual(parser.unparsed, 1)
+        Tracer(parser.events, ticks=ticks)
+        report = ticks.report()
+        self.assertEqual([r['tick'] for r in report], [1, 2, 3])
+        self.assertEqual(report[0]['planning_ms'], 9)
+        self.assertEqual(report[0]['lines'], 3)
+        self.assertEqual(report[0]['replans'], 1)
+        self.assertEqual(report[0]['plan_changes'], 1)
+        self.assertEqual(report[1]['lines'], 0)
+        self.assertEqual([v for _, v in ticks.series['live plan']], [0, 1])
+        self.assertEqual([v for _, v in ticks.series['pending actions']], [0, 1, 0])
+        self.assertEqual([v for _, v in ticks.series['busy agents']], [0, 1, 0])
+
+    def test_generated(self):
+        path = Generator.temp_log(agents=6, messages=20)
+        self.addCleanup(os.remove, path)
+        ticks = Ticks(budget_ms=5)
+        Tracer(Parser(path, ticks=ticks).events, ticks=ticks)
+        self.assertTrue(any(r['planning_ms'] > 0 for r in ticks.report()))
+        self.assertLessEqual(max(v for _, v in ticks.series['busy agents']), 6)
+        counters = ticks.counter_events()
+        self.assertEqual(set(e['name'] for e in counters), set(Ticks.SERIES))
+        self.assertTrue(all(e['ph'] == 'C' for e in counters))
+        self.assertIn('over the 5 ms budget', ticks.render())
+
+    def test_pushdown(self):
+        # filters don't change the tick report and the live plan
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, 'sim.log')
+            Generator(messages=20).write(path)
+            tracer = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tracer.py')
+            reports = []
+            for flags in [[], ['--no-pushdown'], ['--exclude', 'optype=A']]:
+                report = os.path.join(dir, f'ticks{len(reports)}.json')
+                subprocess.run([sys.executable, tracer, path, os.path.join(dir, 'sim'), '--ticks', report] + flags,
+                               check=True, cwd=dir, stdout=subprocess.DEVNULL)
+                with open(report, 'r', encoding='utf-8') as f:
+                    reports.append(json.load(f))
+            ticks = Ticks()
+            Tracer(Parser(path, ticks=ticks).events, ticks=ticks)
+            for report in reports:
+                self.assertEqual(report['ticks'], ticks.report())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,22 +1,141 @@
 #!/usr/bin/env python3
 
+import os
 import sys
+import argparse
 
 from Parser import Parser
 from Tracer import Tracer, CT
 from Filter import FindChildren, FindRelated
+from Sharder import Sharder
+from Stats import Stats
+from Batch import Batch
+from Selector import Selector
+from Plan import PlanDeltas
+from Downsampler import Downsampler
+from Ticks import Ticks
+from Pipeline import Pipeline
+from Server import Server
+from Compare import Compare
 from PG import PG
 from DBSaver import DBSaver
 
+def parse_size(size: str) -> int:
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    size = size.strip().upper().rstrip('B')
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+def parse_args():
+    ap = argparse.ArgumentParser(description='Convert planner logs to Chrome Trace JSON files')
+    ap.add_argument('log_file', help='log file to parse')
+    ap.add_argument('filename', nargs='?', default='trace', help='output files prefix')
+    ap.add_argument('-m', '--merge', action='append', default=[], help='separately written log (--log-separate) to merge in time order, can be repeated')
+    ap.add_argument('--shard-events', type=int, default=0, help='split the trace into shards of about N events')
+    ap.add_argument('--shard-size', type=parse_size, default=0, help='split the trace into shards of about SIZE bytes, e.g. 200M')
+    ap.add_argument('--jobs', type=int, default=1, help='number of processes to parse with --pipeline, write shards and compact traces with')
+    ap.add_argument('--compact', action='store_true', help='write traces without indentation, in parallel with --jobs')
+    add_filter_args(ap)
+    ap.add_argument('--pipeline', action='store_true', help='read, parse, trace and export in concurrent stages')
+    ap.add_argument('--stats', action='store_true', help='collect per-stage timings and counters, print them and add counter tracks to the trace')
+    ap.add_argument('--stats-json', default='', help='save collected stats to this JSON file')
+    ap.add_argument('--profile', default='', help='save cProfile stats to this file')
+    ap.add_argument('--profile-memory', action='store_true', help='trace memory allocations with tracemalloc')
+    ap.add_argument('--ticks', default='', help='save per-tick planning time and replans to this JSON file and add live plan counter tracks')
+    ap.add_argument('--tick-budget', type=float, default=0, help='count ticks planning longer than this many ms')
+    ap.add_argument('--plans', default='', help='write tasks added and removed on every plan change to this file')
+    return ap.parse_args()
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: parser.py <log_file> [filename]")
-        sys.exit(1)
+    if len(sys.argv) > 1 and sys.argv[1] in MODES:
+        MODES[sys.argv[1]](sys.argv[2:])
+        return
+    args = parse_args()
+    apply_filter_args(args)
+    Tracer.compact = args.compact
+    Tracer.jobs = args.jobs
+    stats = Stats(args.stats or bool(args.stats_json) or args.profile_memory)
+    with stats.profile(args.profile, args.profile_memory):
+        run(args, stats)
+    if stats.enabled:
+        print(stats.render(), end='')
+    if args.stats_json:
+        stats.save(args.stats_json)
+
+def add_filter_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument('--include', action='append', default=[], metavar='FIELD=V1,V2', help='export only traces with given type, agent, scope or optype')
+    ap.add_argument('--exclude', action='append', default=[], metavar='FIELD=V1,V2', help='don\'t export traces with given type, agent, scope or optype')
+    ap.add_argument('--all', action='store_true', help='don\'t exclude periodic tasks by default')
+    ap.add_argument('--downsample', action='store_true', help='keep periodic tasks merged into one slice per agent and time bucket')
+    ap.add_argument('--bucket', type=int, default=0, help='downsampling bucket in ms, chosen to fit --budget by default')
+    ap.add_argument('--budget', type=int, default=10000, help='max number of downsampled slices')
+    ap.add_argument('--no-pushdown', action='store_true', help='apply filters at export only, keep all tasks in memory')
+
+def apply_filter_args(args) -> None:
+    Tracer.selector = build_selector(args)
+    if args.downsample:
+        Tracer.downsampler = Downsampler(args.bucket, args.budget)
+
+def build_selector(args) -> Selector:
+    # periodic tasks are kept to be downsampled
+    selector = Selector() if args.all or args.downsample else Selector.default()
+    for rule in args.include:
+        selector.add_rule('include', rule)
+    for rule in args.exclude:
+        selector.add_rule('exclude', rule)
+    return selector
+
+def run(args, stats: Stats):
+    log_file = args.log_file
+    filename = args.filename
+    path = [log_file] + args.merge if args.merge else log_file
+    # the tick profile needs every planner line and live task, filters apply at export only
+    selector = None if args.no_pushdown or args.ticks else Tracer.selector
+    ticks = Ticks(args.tick_budget) if args.ticks else None
+    plans = open(args.plans, 'w', encoding='utf-8') if args.plans else None
+    options = {'on_plan_changed': PlanDeltas(plans) if plans else None, 'ticks': ticks}
+    # shards replace the main, actions and short exports
+    shards = bool(args.shard_events or args.shard_size)
+
+    try:
+        if args.pipeline:
+            with stats.stage('pipeline'):
+                ctr = Pipeline(path, stats=stats, selector=selector, ticks=ticks, jobs=args.jobs).run(filename, export=not shards, **options)
+        else:
+            ctr = run_steps(path, filename, stats, selector, options, export=not shards)
+    finally:
+        if plans:
+            plans.close()
+            print(f"Plan changes written to {args.plans}")
+    if ticks:
+        print(ticks.render(), end='')
+        ticks.save(args.ticks)
+
+    if shards:
+        sharder = Sharder(args.shard_events, args.shard_size, args.jobs, args.compact)
+        ctr.export_shards(f'{filename}-shard', sharder)
+
+    # db = PG({})
+    # dbt = DBSaver(db, ctr)
+    # dbt.save()
+
+    fbt = FindChildren(ctr)
+    fbt.start('DISP_MSG.3p.cv')
+    fbt.export(f'{filename}-children')
+
+    rel = FindRelated(ctr)
+    rel.start('DISP_MSG.3p.cv')
+    rel.export(f'{filename}-related')
 
-    log_file = sys.argv[1]
-    filename = sys.argv[2] if len(sys.argv) > 2 else 'trace'
+    if not shards:
+        CT.short_names = True
+        ctr.export(f'{filename}-short')
 
-    parser = Parser(log_file)
+def run_steps(path, filename: str, stats: Stats, selector: Selector, options: dict, export: bool = True) -> Tracer:
+    with stats.stage('parse'):
+        parser = Parser(path, stats=stats, selector=selector, ticks=options['ticks'])
+    stats.add_parser(parser)
 
     # events = []
     # no = 0
@@ -30,24 +149,73 @@ def main():
     #             ctr.export(name)
     #             print(f'Plan changed No. {no}: {ctr.render_current_plan()}')
 
-    ctr = Tracer(parser.events)
-    ctr.export(f'{filename}')
+    with stats.stage('prepare'):
+        ctr = Tracer(parser.events, stats=stats, **options)
+    if export:
+        with stats.stage('export'):
+            ctr.export(f'{filename}')
+    return ctr
 
-    # db = PG({})
-    # dbt = DBSaver(db, ctr)
-    # dbt.save()
+def batch(argv: list[str]):
+    ap = argparse.ArgumentParser(prog='tracer.py batch', description='Process many session logs in a process pool')
+    ap.add_argument('logs', nargs='+', help='log files, directories or glob patterns')
+    ap.add_argument('-o', '--output', default='.', help='directory to write traces to')
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='number of worker processes')
+    ap.add_argument('--force', action='store_true', help='process logs even if already processed')
+    args = ap.parse_args(argv)
 
-    fbt = FindChildren(ctr)
-    fbt.start('DISP_MSG.3p.cv')
-    fbt.export(f'{filename}-children')
+    results = Batch(args.output, args.jobs, args.force).run(args.logs)
+    print(Batch.render(results), end='')
+    if any(r['status'] == 'failed' for r in results):
+        sys.exit(1)
 
-    rel = FindRelated(ctr)
-    rel.start('DISP_MSG.3p.cv')
-    rel.export(f'{filename}-related')
+def serve(argv: list[str]):
+    ap = argparse.ArgumentParser(prog='tracer.py serve', description='Parse a session once and answer trace queries over HTTP')
+    ap.add_argument('log_file', help='log file to parse')
+    ap.add_argument('-m', '--merge', action='append', default=[], help='separately written log to merge in time order, can be repeated')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8765)
+    add_filter_args(ap)
+    args = ap.parse_args(argv)
+
+    apply_filter_args(args)
+    selector = None if args.no_pushdown else Tracer.selector
+    parser = Parser([args.log_file] + args.merge if args.merge else args.log_file, selector=selector)
+    Server(Tracer(parser.events), args.host, args.port).run()
 
-    CT.short_names = True
-    ctr.export(f'{filename}-short')
+def compare(argv: list[str]):
+    ap = argparse.ArgumentParser(prog='tracer.py compare', description='Compare trace durations and throughput of two sessions')
+    ap.add_argument('old', help='baseline log file')
+    ap.add_argument('new', help='candidate log file')
+    ap.add_argument('--include', action='append', default=[], metavar='FIELD=V1,V2', help='compare only traces with given type, agent, scope or optype')
+    ap.add_argument('--exclude', action='append', default=[], metavar='FIELD=V1,V2', help='don\'t compare traces with given type, agent, scope or optype')
+    ap.add_argument('--threshold', type=float, default=0.1, help='relative change of p50, p99 or rate reported as shift')
+    ap.add_argument('--alpha', type=float, default=0.01, help='significance level')
+    ap.add_argument('--min-count', type=int, default=20, help='test durations of groups with this many traces in both sessions, rates with this many in total')
+    ap.add_argument('--all-rows', action='store_true', help='show groups without shifts too')
+    ap.add_argument('--json', default='', help='save the comparison to this JSON file')
+    ap.add_argument('--jobs', type=int, default=2, help='1 to read the logs one after another')
+    args = ap.parse_args(argv)
+
+    # periodic tasks are compared too unless excluded
+    selector = Selector()
+    for rule in args.include:
+        selector.add_rule('include', rule)
+    for rule in args.exclude:
+        selector.add_rule('exclude', rule)
+    cmp = Compare(selector, args.threshold, args.alpha, args.min_count)
+    result = cmp.run(args.old, args.new, args.jobs)
+    print(Compare.render(result, args.all_rows), end='')
+    if args.json:
+        Compare.save(result, args.json)
+    if any(row['shift'] for row in result['rows']):
+        sys.exit(1)
+
+MODES = {
+    'batch': batch,
+    'serve': serve,
+    'compare': compare,
+}
 
 if __name__ == '__main__':
     main()
-